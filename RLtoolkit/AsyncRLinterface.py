@@ -0,0 +1,168 @@
+# <html><body><pre>
+
+# AsyncRLinterface module
+
+"""
+This module is RLinterface for asyncio: the environment function may be a
+coroutine function (e.g., one that talks to a simulator over a socket), and the
+methods are coroutines, so that many interfaces, each with its own environment,
+can run at the same time on one event loop.  While one is waiting for its
+environment, the others carry on.  The semantics of the methods are those of
+RLinterface.
+
+Class: AsyncRLinterface
+     initialize with:   rli = AsyncRLinterface(agentFunction, envFunction [,limiter])
+          where  agentFunction(s, r) -> a   (r is optional, or may be None)
+                 envFunction(a) -> s, r      (a is optional, or may be None)
+                 either may be an ordinary function or a coroutine function
+                 limiter, if given, is an asyncio.Semaphore shared by several
+                 interfaces, bounding how many environment steps are in flight
+Methods (all coroutines, to be awaited):
+step() --> r, s, a
+steps(numSteps) --> r, s, a, r, s, a, r, s, a, ...
+episode([maxSteps]) --> s0, a0, r1, s1, a1, ..., rT, 'terminal'
+episodes(num, maxSteps [,maxStepsTotal]) --> s0, a0, r1, s1, a1, ..., rT, 'terminal', s0, a0 ...
+stepsQ, episodeQ, episodesQ like steps, episode and episodes but no returned value
+
+Functions:
+runConcurrently(interfaces, numEpisodes [,maxSteps, maxInFlight]) -> list of episodes
+     results, one per interface; a coroutine that runs episodes(numEpisodes,
+     maxSteps) on all the interfaces at once, with at most maxInFlight
+     environment steps in flight
+runEpisodes(interfaces, numEpisodes [,maxSteps, maxInFlight]) - the same, called
+     from ordinary (not async) code; runs its own event loop
+
+"""
+
+import asyncio
+import inspect
+
+
+async def _call(fn, *args):
+    result = fn(*args)
+    if inspect.isawaitable(result):
+        result = await result
+    return result
+
+
+class AsyncRLinterface:  # <a name="AsyncRLinterface"></a>
+    """Object associating a reinforcement learning agent with its environment,
+    whose steps may be awaited; stores next action."""
+
+    def __init__(self, agentFn, envFn, limiter=None):
+        """Store functions defining agent and environment"""
+        self.action = None  # the action to be used in the next step
+        self.agentFunction = agentFn  # the action is set to None to indicate that
+        self.environmentFunction = envFn  # the next step will be the first of an episode
+        self.limiter = limiter
+
+    async def callEnvironment(self, *args):
+        """Call the environment function, waiting for room if there is a limiter"""
+        if self.limiter == None:
+            return await _call(self.environmentFunction, *args)
+        async with self.limiter:
+            return await _call(self.environmentFunction, *args)
+
+    async def step(self):  # <a name="step"></a>
+        """Run one step; this is the core function, used by all the others."""
+        if self.action == None:  # first step of an episode
+            s = await self.callEnvironment()
+            self.action = await _call(self.agentFunction, s)
+            return s, self.action
+        else:
+            s, r = await self.callEnvironment(self.action)
+            self.action = await _call(self.agentFunction, s, r)
+            if s == 'terminal':  # last step of an episode
+                return r, s  # no action but agent learned
+            else:  # regular step
+                return r, s, self.action  # action and learning
+
+    async def steps(self, numSteps):  # <a name="steps"></a>
+        """Run for numSteps steps, regardless of episode endings.
+        return the sequence of sensations, rewards and actions."""
+        oaseq = []
+        for step in range(numSteps):  # run for numSteps steps
+            new = await self.step()
+            oaseq.extend(new)
+        return oaseq
+
+    async def episode(self, maxSteps=1000000):  # <a name="episode"></a>
+        """Run for one episode, to a maximum of maxSteps steps, and return the episode."""
+        self.action = None  # start new episode
+        oaseq = []
+        for step in range(maxSteps):  # run for up to maxSteps
+            new = await self.step()
+            oaseq.extend(new)
+            if self.action == None:  # stop at end of episode
+                break
+        return oaseq
+
+    async def episodes(self, numEpisodes, maxSteps=1000000,
+                       maxStepsTotal=1000000):  # <a name="episodes"></a>
+        """Generate numEpisodes episodes, each no more than maxSteps steps,
+        with no more than maxStepsTotal total; return episodes in one sequence."""
+        oaseq = []
+        await self.runEpisodes(numEpisodes, maxSteps, maxStepsTotal, oaseq.extend)
+        return oaseq
+
+    async def stepsQ(self, numSteps):  # <a name="stepsQ"></a>
+        """Same as steps but quicker, quieter, and returns nothing."""
+        for step in range(numSteps):  # run for numSteps steps
+            await self.step()
+
+    async def episodeQ(self, maxSteps=1000000):  # <a name="episodeQ"></a>
+        """Same as episode but quicker, quieter, and returns nothing."""
+        self.action = None  # start new episode
+        for step in range(maxSteps):  # run for up to maxSteps
+            await self.step()
+            if self.action == None:  # stop at end of episode
+                break
+
+    async def episodesQ(self, numEpisodes, maxSteps=1000000,
+                        maxStepsTotal=1000000):  # <a name="episodesQ"></a>
+        """Same as episodes but quicker, quieter, and returns nothing."""
+        await self.runEpisodes(numEpisodes, maxSteps, maxStepsTotal)
+
+    async def runEpisodes(self, numEpisodes, maxSteps, maxStepsTotal,
+                          record=None):
+        totsteps = 0
+        for episodeNum in range(numEpisodes):  # run for numEpisodes episodes
+            self.action = None  # start new episode
+            for stepNum in range(maxSteps):  # stop if >  maxSteps steps/episode
+                new = await self.step()
+                if record != None:
+                    record(new)
+                totsteps += 1
+                if self.action == None:  # stop at end of episode
+                    break
+                if totsteps >= maxStepsTotal:  # stop episode if reached total steps
+                    break
+            if totsteps >= maxStepsTotal:  # stop run if reached total steps
+                break
+
+
+async def runConcurrently(interfaces, numEpisodes, maxSteps=1000000,
+                          maxInFlight=None):
+    """Run numEpisodes episodes on each interface, all at the same time; the
+    interfaces' own limiters are put back afterwards"""
+    if maxInFlight == None:
+        return await asyncio.gather(*[rli.episodes(numEpisodes, maxSteps)
+                                      for rli in interfaces])
+    limiter = asyncio.Semaphore(maxInFlight)
+    previous = [rli.limiter for rli in interfaces]
+    try:
+        for rli in interfaces:
+            rli.limiter = limiter
+        return await asyncio.gather(*[rli.episodes(numEpisodes, maxSteps)
+                                      for rli in interfaces])
+    finally:
+        for rli, oldLimiter in zip(interfaces, previous):
+            rli.limiter = oldLimiter
+
+
+def runEpisodes(interfaces, numEpisodes, maxSteps=1000000, maxInFlight=None):
+    """runConcurrently, for calling from code that is not async"""
+    return asyncio.run(runConcurrently(interfaces, numEpisodes, maxSteps,
+                                       maxInFlight))
+
+# </pre></body></html>
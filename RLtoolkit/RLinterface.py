@@ -20,9 +20,30 @@ episodes(num, maxSteps [,maxStepsTotal]) --> s0, a0, r1, s1, a1, ..., rT, 'termi
 stepsQ(numSteps) like steps but no returned value (quicker and quieter)
 episodeQ([maxSteps]) like episode but no returned value (quicker and quieter)
 episodesQ(num, maxSteps [,maxTotal]) like episodes but no returned value (quicker and quieter)
+iter_steps([numSteps]) like steps, but yields a Transition for each step as it is done
+iter_episodes([num, maxSteps, maxStepsTotal]) like episodes, but yields Transitions
+     (with no numSteps or num, these go on forever)
+run([numSteps, numEpisodes, maxSteps, onStep, onEpisode]) --> steps, episodes
+     a fused loop, the quickest way to run: stops after numSteps steps or numEpisodes
+     episodes, cutting episodes off after maxSteps steps (not counting the first),
+     calling onStep(r) after each step with a reward and onEpisode(steps, return)
+     after each episode; returns the number of steps and episodes done.  An
+     episode left off by an earlier run is carried on, with its counts so far
+
+A Transition is a named tuple (episode, step, s, a, r, sp, ap): in step number step
+of episode number episode (both counted from 0 within the call), action a in
+sensation s gave reward r and sensation sp, and the agent then chose action ap.
+The first step of an episode has s, a and r all None, and sp is the starting
+sensation.  In the last step, sp is 'terminal' and ap is None.  An episode left
+off by an earlier call goes on with complete transitions (its s and a are kept).
 
 """
 
+from collections import namedtuple
+
+Transition = namedtuple('Transition', ['episode', 'step', 's', 'a', 'r', 'sp',
+                                       'ap'])
+
 
 class RLinterface:  # <a name="RLinterface"></a>[<a href="RLdoc.html#RLinterface">Doc</a>]
     """Object associating a reinforcement learning agent with its environment;
@@ -33,6 +54,9 @@ class RLinterface:  # <a name="RLinterface"></a>[<a href="RLdoc.html#RLinterface
         self.action = None  # the action to be used in the next step
         self.agentFunction = agentFn  # the action is set to None to indicate that
         self.environmentFunction = envFn  # the next step will be the first of an episode
+        self.sensation = None  # the last sensation, to carry on an episode left off
+        self.episodeSteps = 0  # steps and return so far in the current episode,
+        self.episodeReturn = 0.0  # as counted by run
 
     def step(self):  # <a name="step"></a>[<a href="RLdoc.html#step">Doc</a>]
         """Run one step; this is the core function, used by all the others in RLinterface module."""
@@ -40,10 +64,14 @@ class RLinterface:  # <a name="RLinterface"></a>[<a href="RLdoc.html#RLinterface
         if self.action == None:  # first step of an episode
             s = self.environmentFunction()
             self.action = self.agentFunction(s)
+            self.sensation = s
+            self.episodeSteps = 0
+            self.episodeReturn = 0.0
             return s, self.action
         else:
             s, r = self.environmentFunction(self.action)
             self.action = self.agentFunction(s, r)
+            self.sensation = s
             if s == 'terminal':  # last step of an episode
                 return r, s  # no action but agent learned
             else:  # regular step
@@ -122,4 +150,93 @@ class RLinterface:  # <a name="RLinterface"></a>[<a href="RLdoc.html#RLinterface
             if totsteps >= maxStepsTotal:  # stop run if reached total steps
                 break
 
+    def run(self, numSteps=None, numEpisodes=None, maxSteps=1000000,
+            onStep=None,
+            onEpisode=None):  # <a name="run"></a>[<a href="RLdoc.html#run">Doc</a>]
+        """Run the agent and environment in one tight loop, keeping only counts."""
+        agentFn = self.agentFunction
+        envFn = self.environmentFunction
+        stepLimit = float('inf') if numSteps == None else numSteps
+        episodeLimit = float('inf') if numEpisodes == None else numEpisodes
+        action = self.action
+        s = self.sensation
+        episodeSteps = self.episodeSteps  # carry on any episode left off
+        ret = self.episodeReturn
+        steps = episodes = 0
+        while steps < stepLimit and episodes < episodeLimit:
+            steps += 1
+            if action is None:  # first step of an episode
+                s = envFn()
+                action = agentFn(s)
+                episodeSteps = 0
+                ret = 0.0
+                continue
+            s, r = envFn(action)
+            action = agentFn(s, r)
+            episodeSteps += 1
+            ret += r
+            if onStep is not None:
+                onStep(r)
+            if action is None or episodeSteps >= maxSteps:  # end of episode
+                action = None
+                episodes += 1
+                if onEpisode is not None:
+                    onEpisode(episodeSteps, ret)
+        self.action = action
+        self.sensation = s
+        self.episodeSteps = episodeSteps
+        self.episodeReturn = ret
+        return steps, episodes
+
+    def iter_steps(self,
+                   numSteps=None):  # <a name="iter_steps"></a>[<a href="RLdoc.html#iter_steps">Doc</a>]
+        """Run for numSteps steps (or forever), regardless of episode endings,
+        yielding a Transition for each."""
+        episodeNum = stepNum = 0
+        steps = 0
+        while numSteps == None or steps < numSteps:
+            s, a = self.sensation, self.action  # carries on any episode left off
+            starting = a == None
+            new = self.step()
+            steps += 1
+            if starting:  # first step of an episode
+                if steps > 1:
+                    episodeNum += 1
+                stepNum = 0
+                sp, ap = new
+                yield Transition(episodeNum, 0, None, None, None, sp, ap)
+            else:
+                stepNum += 1
+                r, sp = new[0], new[1]
+                yield Transition(episodeNum, stepNum, s, a, r, sp, self.action)
+
+    def iter_episodes(self, numEpisodes=None, maxSteps=1000000,
+                      maxStepsTotal=None):  # <a name="iter_episodes"></a>[<a href="RLdoc.html#iter_episodes">Doc</a>]
+        """Generate numEpisodes episodes (or go on forever), each no more than
+        maxSteps steps, with no more than maxStepsTotal total, yielding a
+        Transition for each step."""
+        totsteps = 0
+        episodeNum = 0
+        while numEpisodes == None or episodeNum < numEpisodes:
+            self.action = None  # start new episode
+            s = a = None
+            for stepNum in range(maxSteps):  # stop if >  maxSteps steps/episode
+                new = self.step()
+                totsteps += 1
+                if stepNum == 0:
+                    sp, ap = new
+                    yield Transition(episodeNum, 0, None, None, None, sp, ap)
+                else:
+                    r, sp = new[0], new[1]
+                    ap = self.action
+                    yield Transition(episodeNum, stepNum, s, a, r, sp, ap)
+                s, a = sp, ap
+                if self.action == None:  # stop at end of episode
+                    break
+                if maxStepsTotal != None and totsteps >= maxStepsTotal:
+                    break
+            if maxStepsTotal != None and totsteps >= maxStepsTotal:
+                break
+            episodeNum += 1
+
 # </pre></body></html>
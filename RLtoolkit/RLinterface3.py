@@ -21,8 +21,16 @@ Class: RLinterface
                  env_state() -> state key
                  env_random_seed() -> random seed key
                  optionally env_step can take a state key and a random seed key
+     or:                rli = RLinterface(agent, env, recorder)
+          to also record every transition in a trajectory.TrajectoryRecorder
 Methods:
-RL_benchmark() -> performance, standard error
+RL_benchmark(num_runs, num_episodes [,gamma, max_steps, seeds, max_workers])
+     -> performance, standard error
+     runs num_runs independent copies of the agent and environment (as they are
+     now), each for num_episodes episodes with its own random seed (seeds[i], or
+     i by default), optionally in max_workers processes.  A run's performance is
+     its average gamma discounted reward per episode; the mean of these over
+     the runs and its standard error are accumulated as the runs finish.
 RL_init()
 RL_start() -> o, a
 RL_step() -> r, o, a
@@ -33,15 +41,22 @@ RL_num_steps() -> number of steps in current/last episode
 
 """
 
+import copy
+import random
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from .utilities import RunningStats
+
 
 class RLinterface:  # <a name="RLinterface"></a>[<a href="RLdoc.html#RLinterface">Doc</a>]
     """Object associating a reinforcement learning agent with its environment;
     stores next action; see http://rlai.cs.ualberta.ca/RLAI/RLinterface.html."""
 
-    def __init__(self, agent, env):
+    def __init__(self, agent, env, recorder=None):
         """Store functions defining agent and environment"""
         self.agent = agent
         self.environment = env
+        self.recorder = recorder
         self.numsteps = 0
         self.rewards = []
         self.o = 'terminal'  # force start of new episode
@@ -59,13 +74,18 @@ class RLinterface:  # <a name="RLinterface"></a>[<a href="RLdoc.html#RLinterface
         self.a = self.agent.agent_start(self.o)
         self.rewards = []
         self.numsteps = 0
+        if self.recorder != None:
+            self.recorder.startEpisode()
         return self.o, self.a
 
     def RL_step(self):
         """Do one step of the simulation"""
+        lasto = self.o
         r, self.o = self.environment.env_step(self.a)
         self.rewards.append(r)
         self.numsteps += 1
+        if self.recorder != None:
+            self.recorder.add(lasto, self.a, r, self.o == 'terminal')
         if self.o == 'terminal':
             self.agent.agent_end(r)
             self.a = None
@@ -97,4 +117,44 @@ class RLinterface:  # <a name="RLinterface"></a>[<a href="RLdoc.html#RLinterface
         """returns number of steps so far or in last episode"""
         return self.numsteps
 
+    def RL_benchmark(self, num_runs=10, num_episodes=100, gamma=1.0,
+                     max_steps=None, seeds=None, max_workers=1):
+        """Average performance of independent runs, and its standard error"""
+        if seeds == None:
+            seeds = list(range(num_runs))
+        runs = [(self.agent, self.environment, seeds[i], num_episodes, gamma,
+                 max_steps) for i in range(num_runs)]
+        runstats = RunningStats()
+        if max_workers == 1:  # in this process: leave its generators as they were
+            randomState, numpyState = random.getstate(), np.random.get_state()
+            try:
+                for run in runs:
+                    runstats.add(benchmarkRun(*copy.deepcopy(run)))
+            finally:
+                random.setstate(randomState)
+                np.random.set_state(numpyState)
+        else:
+            with ProcessPoolExecutor(max_workers) as pool:
+                futures = [pool.submit(benchmarkRun, *run) for run in runs]
+                for future in as_completed(futures):
+                    runstats.add(future.result())
+        return runstats.stats()
+
+
+def benchmarkRun(agent, env, seed, num_episodes, gamma, max_steps=None):
+    """Does one run of RL_benchmark with (a copy of) agent and env, returning the
+    average discounted reward per episode"""
+    random.seed(seed)
+    np.random.seed(seed)
+    rli = RLinterface(agent, env)
+    total = 0.0
+    for episode in range(num_episodes):
+        rli.RL_start()
+        while rli.o != 'terminal':
+            rli.RL_step()
+            if max_steps != None and rli.numsteps >= max_steps:
+                break
+        total += rli.RL_total_reward(gamma)
+    return total / num_episodes
+
 # </pre></body></html>
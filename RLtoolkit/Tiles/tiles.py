@@ -46,11 +46,16 @@ Useful routines and classes:
            wrapwidths - which specifies for each float the width of the range over
               which it wraps (e.g., 2pi). If you don't want a float to wrap, it's wrap-width
               should be zero. The wrapping width is in the same units as the floats, but an integer
+       tilesbatch(numtilings, memctable, floats, ints)
+           like tiles, but floats is an (N x numfloats) array with one set of real
+           variables per row; returns an (N x numtilings) array of the same tiles
+           tiles would give for each row, computed with whole-array operations
 """
 
 import random
 import math
 import operator
+import numpy as np
 
 _maxnumfloats = 20  # maximum number of variables used in one grid
 _maxLongint = 2147483647  # maximum integer
@@ -58,6 +63,7 @@ _maxLongintBy4 = _maxLongint // 4  # maximum integer divided by 4
 _randomTable = [random.randrange(_maxLongintBy4) for i in
                 range(2048)]  # table of random numbers
 # _randomTable = [random.randrange(65536) for i in xrange(2048)]   #table of random numbers
+_randomArray = np.array(_randomTable, dtype=np.int64)  # same table, for tilesbatch
 
 # The following are temporary variables used by tiles.
 _qstate = [0 for i in range(_maxnumfloats)]
@@ -307,5 +313,33 @@ def loadtileswrap(tiles, startelement, numtilings, memctable, floats,
         tiles[startelement + j] = hnum
 
 
+def tilesbatch(numtilings, memctable, floats, ints=[]):
+    """Returns an (N x numtilings) array of tiles, row i holding the tiles for the
+        variables in row i of floats (and ints), hashed down to mem, using ctable
+        to check for collisions"""
+    floats = np.asarray(floats, dtype=float)
+    n, numfloats = floats.shape
+    numcoord = 1 + numfloats + len(ints)
+    qstate = np.floor(floats * numtilings).astype(np.int64)
+    tilings = np.arange(numtilings)
+    base = np.outer(tilings, 1 + 2 * np.arange(numfloats))  # base for each tiling
+    coordinates = np.empty((n, numtilings, numcoord), dtype=np.int64)
+    q = qstate[:, np.newaxis, :]
+    coordinates[:, :, :numfloats] = q - ((q - base) % numtilings)
+    coordinates[:, :, numfloats] = tilings
+    coordinates[:, :, numfloats + 1:] = ints
+    if isinstance(memctable, CollisionTable):  # collisions must be handled in order
+        tlist = np.empty((n, numtilings), dtype=np.intp)
+        for i in range(n):
+            for j in range(numtilings):
+                tlist[i, j] = hash(coordinates[i, j].tolist(), numcoord,
+                                   memctable)
+        return tlist
+    else:
+        increments = np.arange(numcoord) * 449
+        hashes = _randomArray[(coordinates + increments) % 2048].sum(axis=-1)
+        return (hashes % memctable).astype(np.intp)
+
+
 getTiles = tiles
 loadTiles = loadtiles
@@ -0,0 +1,113 @@
+# <html><body><pre>
+
+# VecRLinterface module
+
+"""
+This module runs one agent with N copies of an environment, stepping them all
+together (in lockstep), so that the agent can do its computation for all N at
+once, e.g., with array operations.  It follows the conventions of RLinterface,
+applied to each copy separately: on the first step of an episode the environment
+is called with no action and returns a starting sensation, the agent is told the
+sensation with no reward, and the episode ends when the sensation is 'terminal'.
+A copy whose episode has ended starts a new one on its next step, while the
+others carry on with theirs.
+
+Class: VecRLinterface
+     initialize with:   rli = VecRLinterface(agentFunction, envFunctions)
+                   or   rli = VecRLinterface(agentFunction, envBatchFunction, num)
+          where  agentFunction(slist, rlist) -> alist
+                 envFunctions is a list of N functions envFunction(a) -> s, r
+                     (with no a at the start of an episode, returning just s)
+                 envBatchFunction(alist) -> slist, rlist
+          slist, rlist and alist are lists (or arrays) of N sensations, rewards and
+          actions.  An action of None tells the environment to start copy i's
+          episode; its reward is then None too.  The actions returned for copies
+          whose sensation is 'terminal' are ignored.
+Methods:
+step() --> rlist, slist, alist
+steps(numSteps) --> the number of episodes completed
+episodes(numEpisodes [,maxStepsTotal]) --> the returns of the first numEpisodes
+     episodes completed, in order of completion
+stepsQ(numSteps) like steps but no returned value
+Attributes:
+numEpisodes - the number of episodes completed, over all the copies
+returns - the total reward so far in each copy's current episode
+
+"""
+
+
+class VecRLinterface:  # <a name="VecRLinterface"></a>
+    """Object associating a reinforcement learning agent with N copies of its
+    environment; stores each copy's next action"""
+
+    def __init__(self, agentFn, envFns, num=None):
+        """Store functions defining agent and environments"""
+        self.agentFunction = agentFn
+        if isinstance(envFns, (list, tuple)):  # one scalar function per copy
+            self.environmentFunctions = list(envFns)
+            self.environmentBatchFunction = self.loopEnvironments
+            self.num = len(self.environmentFunctions)
+        else:
+            self.environmentFunctions = None
+            self.environmentBatchFunction = envFns
+            self.num = num
+        self.actions = [None] * self.num  # None starts a new episode
+        self.returns = [0.0] * self.num
+        self.numEpisodes = 0
+        self.completedReturns = []  # returns of episodes finished in the last step
+
+    def loopEnvironments(self, alist):
+        """Steps each scalar environment function in turn"""
+        slist = [None] * self.num
+        rlist = [None] * self.num
+        for i, (envFn, a) in enumerate(zip(self.environmentFunctions, alist)):
+            if a is None:  # first step of an episode
+                slist[i] = envFn()
+            else:
+                slist[i], rlist[i] = envFn(a)
+        return slist, rlist
+
+    def step(self):  # <a name="step"></a>
+        """Run one step of every copy"""
+        slist, rlist = self.environmentBatchFunction(self.actions)
+        alist = list(self.agentFunction(slist, rlist))
+        self.completedReturns = []
+        for i in range(self.num):
+            r = rlist[i]
+            if r is None:  # first step of an episode
+                self.returns[i] = 0.0
+            else:
+                self.returns[i] += r
+            if isinstance(slist[i], str) and slist[i] == 'terminal':
+                alist[i] = None  # start a new episode on the next step
+                self.completedReturns.append(self.returns[i])
+                self.numEpisodes += 1
+        self.actions = alist
+        return rlist, slist, alist
+
+    def stepsQ(self, numSteps):  # <a name="stepsQ"></a>
+        """Run every copy for numSteps steps, regardless of episode endings"""
+        for step in range(numSteps):
+            self.step()
+
+    def steps(self, numSteps):  # <a name="steps"></a>
+        """Run every copy for numSteps steps, regardless of episode endings;
+        return the number of episodes completed"""
+        start = self.numEpisodes
+        self.stepsQ(numSteps)
+        return self.numEpisodes - start
+
+    def episodes(self, numEpisodes,
+                 maxStepsTotal=1000000):  # <a name="episodes"></a>
+        """Step all the copies until numEpisodes episodes have been completed, over
+        all of them, or maxStepsTotal lockstep steps have been done; return the
+        returns of the completed episodes"""
+        returns = []
+        for step in range(maxStepsTotal):
+            self.step()
+            returns.extend(self.completedReturns)
+            if len(returns) >= numEpisodes:
+                break
+        return returns[:numEpisodes]
+
+# </pre></body></html>
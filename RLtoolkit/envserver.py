@@ -0,0 +1,224 @@
+# Environment server module
+
+"""
+Runs an environment (one with env_init, env_start and env_step, as used by
+RLinterface3) in a separate worker process, so that the agent and the
+environment compute on different cores instead of sharing one interpreter.
+
+     env = RemoteEnvironment(envFactory, obsShape, obsDtype, actionShape,
+                             actionDtype [,slots])
+          envFactory() makes the environment, in the worker process (so it must be
+          picklable, e.g., a class or a function defined at the top level of a
+          module).  Observations must be numbers or arrays of shape obsShape, and
+          actions of shape actionShape, or 'terminal'.
+     env can then be used like the environment itself:
+          env.env_init() -> taskspec, env.env_start() -> o, env.env_step(a) -> r, o
+     and also, to have several steps in flight at once:
+          env.submitStep(a), then env.receive() -> r, o (in the same order)
+     env.close() stops the worker (also done on leaving a with statement)
+
+Actions go to the worker, and observations and rewards come back, through two
+ring buffers of slots records in shared memory, with a semaphore on each side
+to say how many records are waiting, so no message is pickled.  Only the
+taskspec returned by env_init, and the text of any exception raised by the
+environment (which is raised again here as a RuntimeError), go through a pipe.
+
+LocalTestEnvironment is a stand in for a CPU heavy environment: a random walk
+that does some busy work on every step.
+"""
+
+import multiprocessing
+import traceback
+import numpy as np
+from multiprocessing import shared_memory
+
+_init, _start, _step, _close = range(4)
+
+
+def requestDtype(actionShape=(), actionDtype=int):
+    return np.dtype([('command', np.int8),
+                     ('action', actionDtype, tuple(actionShape))])
+
+
+def resultDtype(obsShape=(), obsDtype=float):
+    return np.dtype([('obs', obsDtype, tuple(obsShape)),
+                     ('reward', np.float64),
+                     ('terminal', np.bool_),
+                     ('error', np.bool_)])
+
+
+def serve(envFactory, requestName, resultName, requestType, resultType, slots,
+          requestsWaiting, resultsWaiting, conn):
+    "The worker process: does each request in the request ring, in order"
+    requestMemory = shared_memory.SharedMemory(requestName)
+    resultMemory = shared_memory.SharedMemory(resultName)
+    requests = np.ndarray(slots, dtype=requestType, buffer=requestMemory.buf)
+    results = np.ndarray(slots, dtype=resultType, buffer=resultMemory.buf)
+    env = None
+    slot = 0
+    try:
+        while True:
+            requestsWaiting.acquire()
+            request = requests[slot]
+            command = request['command']
+            result = results[slot]
+            result['error'] = False
+            if command == _close:
+                break
+            try:
+                if command == _init:
+                    env = envFactory()
+                    conn.send(env.env_init())
+                elif command == _start:
+                    result['obs'] = env.env_start()
+                    result['terminal'] = False
+                else:
+                    action = request['action']
+                    if action.ndim == 0:
+                        action = action.item()
+                    else:  # the slot will be reused
+                        action = action.copy()
+                    r, o = env.env_step(action)
+                    result['reward'] = r
+                    result['terminal'] = isinstance(o, str) and o == 'terminal'
+                    if not result['terminal']:
+                        result['obs'] = o
+            except Exception:
+                result['error'] = True
+                conn.send(traceback.format_exc())
+            resultsWaiting.release()
+            slot = (slot + 1) % slots
+    finally:
+        del requests, results, request, result
+        requestMemory.close()
+        resultMemory.close()
+
+
+class RemoteEnvironment:
+    "An environment running in a worker process, talked to through shared memory"
+
+    def __init__(self, envFactory, obsShape=(), obsDtype=float, actionShape=(),
+                 actionDtype=int, slots=8):
+        self.slots = slots
+        requestType = requestDtype(actionShape, actionDtype)
+        resultType = resultDtype(obsShape, obsDtype)
+        self.requestMemory = shared_memory.SharedMemory(
+            create=True, size=requestType.itemsize * slots)
+        self.resultMemory = shared_memory.SharedMemory(
+            create=True, size=resultType.itemsize * slots)
+        self.requests = np.ndarray(slots, dtype=requestType,
+                                   buffer=self.requestMemory.buf)
+        self.results = np.ndarray(slots, dtype=resultType,
+                                  buffer=self.resultMemory.buf)
+        self.requestsWaiting = multiprocessing.Semaphore(0)
+        self.resultsWaiting = multiprocessing.Semaphore(0)
+        self.conn, workerConn = multiprocessing.Pipe()
+        self.nextRequest = 0  # slot for the next request
+        self.nextResult = 0  # slot of the next result to receive
+        self.numWaiting = 0  # requests sent whose results haven't been received
+        self.process = multiprocessing.Process(
+            target=serve, daemon=True,
+            args=(envFactory, self.requestMemory.name, self.resultMemory.name,
+                  requestType, resultType, slots, self.requestsWaiting,
+                  self.resultsWaiting, workerConn))
+        self.process.start()
+
+    def submit(self, command, action=None):
+        "Puts a request in the next slot of the request ring"
+        if self.numWaiting == self.slots:
+            raise RuntimeError("All %d slots are waiting for results" % self.slots)
+        request = self.requests[self.nextRequest]
+        request['command'] = command
+        if action is not None:
+            request['action'] = action
+        self.nextRequest = (self.nextRequest + 1) % self.slots
+        self.numWaiting += 1
+        self.requestsWaiting.release()
+
+    def submitStep(self, a):
+        self.submit(_step, a)
+
+    def waitForResult(self):
+        "Waits for the next result and returns its record"
+        while not self.resultsWaiting.acquire(timeout=1.0):
+            if not self.process.is_alive():
+                raise RuntimeError("Environment process has died")
+        result = self.results[self.nextResult]
+        self.nextResult = (self.nextResult + 1) % self.slots
+        self.numWaiting -= 1
+        if result['error']:
+            raise RuntimeError("Environment raised an exception:\n" +
+                               self.conn.recv())
+        return result
+
+    def observation(self, result):
+        obs = result['obs']
+        if obs.ndim == 0:
+            return obs.item()
+        return obs.copy()  # the slot will be reused
+
+    def receive(self):
+        "The reward and observation of the next step submitted"
+        result = self.waitForResult()
+        if result['terminal']:
+            return result['reward'].item(), 'terminal'
+        return result['reward'].item(), self.observation(result)
+
+    def env_init(self):
+        self.submit(_init)
+        self.waitForResult()
+        return self.conn.recv()
+
+    def env_start(self):
+        self.submit(_start)
+        return self.observation(self.waitForResult())
+
+    def env_step(self, a):
+        self.submit(_step, a)
+        return self.receive()
+
+    def close(self):
+        "Stops the worker process and frees the shared memory"
+        if self.process.is_alive():
+            self.submit(_close)
+            self.process.join()
+        del self.requests, self.results
+        self.requestMemory.close()
+        self.requestMemory.unlink()
+        self.resultMemory.close()
+        self.resultMemory.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        self.close()
+
+
+class LocalTestEnvironment:
+    """Random walk over numstates states, starting in the middle, ending with
+    reward -1 at the left end and +1 at the right; action 0 goes left, and any
+    other right.  Each step does work iterations of busy work."""
+
+    def __init__(self, numstates=21, work=10000):
+        self.numstates = numstates
+        self.work = work
+
+    def env_init(self):
+        self.curstate = self.numstates // 2
+        return 2, self.numstates
+
+    def env_start(self):
+        self.curstate = self.numstates // 2
+        return self.curstate
+
+    def env_step(self, a):
+        total = 0
+        for i in range(self.work):  # stand in for a costly simulation
+            total += i * i
+        self.curstate += -1 if a == 0 else 1
+        if self.curstate == 0:
+            return -1, 'terminal'
+        elif self.curstate == self.numstates - 1:
+            return 1, 'terminal'
+        return 0, self.curstate
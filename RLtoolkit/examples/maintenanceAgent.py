@@ -20,12 +20,14 @@ from RLtoolkit.utilities import *
 class TabularAgent:
     "Tabular agent for maintenance example"
 
-    def __init__(self, num_st, num_a, alph=.01, gam=.99, ep=.1, init=0.0):
+    def __init__(self, num_st, num_a, alph=.01, gam=.99, ep=.1, init=0.0,
+                 rng=None):
         self.num_actions = num_a  # number of actions (maint, run)
         self.num_states = num_st  # number of states
         self.alpha = alph  # alpha (learning rate)
         self.gamma = gam  # gamma (discount rate)
         self.epsilon = ep  # epsilon (exploration rate)
+        self.rng = rng  # random number stream (None for the global one)
         self.lastAction = None
         self.lastState = None
         init = float(init)
@@ -37,8 +39,8 @@ class MaintenanceAgent(TabularAgent):
     "Tabular agent plus some additional stats"
 
     def __init__(self, num_st, num_a, alph=0.1, gam=0.99, ep=.1, \
-                 interval=1000, init=0.0):
-        TabularAgent.__init__(self, num_st, num_a, alph, gam, ep, init)
+                 interval=1000, init=0.0, rng=None):
+        TabularAgent.__init__(self, num_st, num_a, alph, gam, ep, init, rng)
         self.sum_interval = interval  # set sum interval
         self.num_rewards = 0  # initialize counters
         self.sum_rewards = 0.0  # to 0
@@ -77,7 +79,7 @@ def collectData(agent, s, a, r, sp):
 def choose(agent, verbose, s):
     "Agent choose function"
     av = actionValues(agent, s)
-    a = egreedy(agent.epsilon, agent.num_actions, av)
+    a = egreedy(agent.epsilon, agent.num_actions, av, agent.rng)
     if verbose > 1:
         if a == 0:
             comment = "(maint)"
@@ -103,9 +105,9 @@ def maintenanceAgent(agent, verbose, s, r=None):
 
 
 def getMaintAgent(numst, numa, alph=0.01, gam=0.99, ep=0.1, init=0.0, \
-                  interval=1000, verbose=1):
+                  interval=1000, verbose=1, rng=None):
     global agt
-    agt = MaintenanceAgent(numst, numa, alph, gam, ep, interval, init)
+    agt = MaintenanceAgent(numst, numa, alph, gam, ep, interval, init, rng)
     agt.agentFunction = lambda s, r=None: maintenanceAgent(agt, verbose, s, r)
     return agt
 
@@ -21,13 +21,14 @@ from RLtoolkit.utilities import *
 class MaintEnv:
     "Maintenance environment"
 
-    def __init__(self, num=10, prob_p=.9, prob_q=.9):
+    def __init__(self, num=10, prob_p=.9, prob_q=.9, rng=None):
         self.num_actions = 2  # number of actions (run, maint)
         self.n = num  # number of running states
         self.num_states = num + 2  # running states, end, broken
         self.p = prob_p  # prob of staying running
         self.q = prob_q  # prob of staying broken
         self.LastState = None  # last state
+        self.rng = rng  # random number stream (None for the global one)
 
 
 def reward(env, s, a, sp):
@@ -47,12 +48,12 @@ def nextState(env, s, a):
         news = 0  # always causes reset
     elif s == env.n + 1:  # in broken state
         news = withProb(env.q, s,
-                        0)  # with prob q stay there, but might fix itself
+                        0, env.rng)  # with prob q stay there, but might fix itself
     elif s == env.n:  # final state
         news = env.n + 1  # must break
     else:  # for anything else
         news = withProb(env.p ** (s + 1), s + 1,
-                        env.n + 1)  # take chances going to next state
+                        env.n + 1, env.rng)  # take chances going to next state
     return news  # chance of breaking increases with state
 
 
@@ -93,8 +94,8 @@ def maintenanceEnvironment(env, verbose, a=None):
         return s, r
 
 
-def getMaintEnv(n=10, p=0.9, q=0.9, verbose=1):
+def getMaintEnv(n=10, p=0.9, q=0.9, verbose=1, rng=None):
     global env
-    env = MaintEnv(n, p, q)
+    env = MaintEnv(n, p, q, rng)
     env.envFunction = lambda a=None: maintenanceEnvironment(env, verbose, a)
     return env
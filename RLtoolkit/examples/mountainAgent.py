@@ -4,6 +4,7 @@
 # RL interface function is mountainAgent(s, r=None)
 #    e.g. rli = RLinterface(mountainAgent, mountainEnv)
 
+import numpy as np
 from RLtoolkit.Tiles.tiles import *
 from RLtoolkit.traces import *
 from RLtoolkit.utilities import *
@@ -21,10 +22,10 @@ gamma = 1.0  # discount rate
 lasts = None
 lasta = 1
 lastr = 0
-traceH = TraceHolder(n, 0.01, 1000)
+traceH = ArrayTraceHolder(n, 0.01, 1000)
 F = [[0 for item1 in range(numTilings)] for item2 in
      range(m)]  # vector of eligibility traces
-theta = [0. for item in range(n)]
+theta = np.zeros(n)
 qValues = [0. for item in range(m)]  # array of action values
 cTable = CollisionTable(4096, 'safe')  # was 2048
 
@@ -50,10 +51,10 @@ def setupAgent():
     "(Re)Initialize agent"
     global traceH, F, qValues, theta, lasts, lasta, lastr, cTable
     lasts, lasta, lastr = None, 1, 0
-    traceH = TraceHolder(n, 0.01, 1000)
+    traceH = ArrayTraceHolder(n, 0.01, 1000)
     F = [[0 for item1 in range(numTilings)] for item2 in range(m)]
     qValues = [0.0 for item in range(m)]
-    theta = [0.0 for item in range(n)]
+    theta = np.zeros(n)
     cTable = CollisionTable(4096)
 
 
@@ -78,10 +79,7 @@ def learnSarsa(lastS, lastA, r, s, a):
         delta = r - lastq
         delta += gamma * qValues[a]
         amt = delta * (alpha / numTilings)
-        for i in traceH.getTraceIndices():
-            theta[i] += amt * traceH.getTrace(i)
-        traceH.decayTraces(gamma * lambd)
-        traceH.replaceTraces(F[a])
+        traceH.applyDecayReplace(theta, amt, gamma * lambd, F[a])
         # traceH.accumulateTraces(F[a])
         # alist = range(m)
         # alist.remove(a)
@@ -103,10 +101,7 @@ def setEpsilon(new):
 
 def computeQ(a):
     "compute value of action for current F and theta"
-    q = 0
-    for i in F[a]:
-        q += theta[i]
-    return q
+    return theta[F[a]].sum()
 
 
 def loadFeatures(F, pos, vel, a):
@@ -125,5 +120,4 @@ def loadF(F, pos, vel):
 
 
 def updateTheta(amt):
-    for i in traceH.getTraceIndices():
-        theta[i] += amt * traceH.getTrace(i)
+    traceH.applyToWeights(theta, amt)
@@ -24,6 +24,7 @@
 # Modified to use the RL interface in April 2004
 
 from RLtoolkit.RLinterface import RLinterface
+from RLtoolkit.experiments import runExperiment, learningCurve
 from .mountainEnv import *
 from .mountainAgent import *
 
@@ -67,6 +68,25 @@ def mcTest(numEpisodes, maxsteps=2000, epsil=0.01, alph=0.5):
     return (mcEpisodes(numEpisodes, maxsteps))
 
 
+def mcFactory(params, seed):
+    "Reinitializes the agent and environment for a run of runExperiment"
+    setAlpha(params.get('alpha', 0.5))
+    setEpsilon(params.get('epsilon', 0.01))
+    setupAgent()
+    setupEnv()
+    return mountainAgent, mountainEnv
+
+
+def mcSweep(alphas, epsilons, seeds, numEpisodes, maxsteps=2000,
+            maxWorkers=None):
+    """Runs numEpisodes episodes for every combination of alpha, epsilon and seed,
+        in parallel, and returns the learning curves (mean and standard error of
+        the steps per episode) for each combination of alpha and epsilon"""
+    results = runExperiment(mcFactory, {'alpha': alphas, 'epsilon': epsilons},
+                            seeds, numEpisodes, maxsteps, maxWorkers)
+    return [(r['params'], learningCurve(r, 'steps')) for r in results]
+
+
 def mcHelp():
     print("""Mountain Car Demo:
    To run:
@@ -88,6 +108,10 @@ def mcHelp():
            maxsteps is the maximum number of steps per episode (default 2000)
            epsilon is the exploration rate (default is 0.01)
            alpha is the learning rate (default is 0.9)
+      mcSweep(alphas, epsilons, seeds, numepisodes, maxsteps)
+        Runs mcTest for every combination of alpha, epsilon and seed, on all
+        the cores, and returns the mean and standard error of the steps per
+        episode for each combination of alpha and epsilon.
     """)
 
 
@@ -0,0 +1,168 @@
+# Experiments module
+
+"""
+Runs many independent runs of an agent and environment, for every combination
+of parameter values and every random seed, spread over a pool of processes, and
+collects their learning curves.
+
+     results = runExperiment(factory, paramGrid, seeds, numEpisodes [,maxSteps]
+                             [,maxWorkers] [,callback])
+          where  factory(params, seed) -> agentFunction, envFunction
+                     makes a new (or reinitialized) agent and environment, as used
+                     by RLinterface, for the parameter values in the dict params.
+                     It is called in the worker process, after the random and
+                     numpy.random generators have been seeded with seed, and must be
+                     defined at the top level of a module so it can be pickled.
+                     To depend on no global state, it can instead give the agent
+                     and environment streams of their own, from
+                     utilities.randomStreams(seed, 2)
+                 paramGrid is a dict of parameter name -> list of values, whose
+                     combinations are all run, or a list of params dicts
+                 seeds is a list of random seeds, one run per seed
+                 callback(params, seed, episodeNum, ret, steps), if given, is
+                     called in this process as each run's episodes finish
+                 maxWorkers is the number of processes (default: one per core);
+                     with maxWorkers=1 everything is run in this process
+     results is a list, one entry per combination of parameters, of dicts with
+                 'params'   the params dict
+                 'seeds'    the seeds
+                 'returns'  (numSeeds x numEpisodes) array of the episodes' returns
+                 'steps'    (numSeeds x numEpisodes) array of their lengths
+
+     mean, stderr = learningCurve(result [,measure])
+          the mean over seeds of result[measure] ('returns' or 'steps') for each
+          episode, and its standard error (computed as utilities.stats does)
+
+Since each run is a separate call of factory in some worker process, agents and
+environments kept in module globals (like those of examples.mountainAgent) are
+fine as long as factory reinitializes them.
+"""
+
+import itertools
+import os
+import random
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from multiprocessing import Manager
+from queue import Empty
+from .RLinterface import RLinterface
+
+
+def paramCombinations(paramGrid):
+    "Returns the list of params dicts for every combination of values in paramGrid"
+    if isinstance(paramGrid, (list, tuple)):
+        return [dict(params) for params in paramGrid]
+    names = sorted(paramGrid.keys())
+    return [dict(zip(names, values))
+            for values in itertools.product(*[paramGrid[n] for n in names])]
+
+
+def runEpisodes(agentFn, envFn, numEpisodes, maxSteps=10000, report=None):
+    """Runs numEpisodes episodes with RLinterface; returns the list of their
+    returns and the list of their lengths.  report(episodeNum, ret, steps) is
+    called after each episode."""
+    returns = []
+    lengths = []
+
+    def episodeDone(steps, ret):
+        if report != None:
+            report(len(returns), ret, steps)
+        returns.append(ret)
+        lengths.append(steps)
+
+    RLinterface(agentFn, envFn).run(numEpisodes=numEpisodes, maxSteps=maxSteps,
+                                    onEpisode=episodeDone)
+    return returns, lengths
+
+
+def runOne(factory, params, seed, numEpisodes, maxSteps=10000, queue=None,
+           runNum=None):
+    "Does the run for params and seed, in whatever process this is called in"
+    random.seed(seed)
+    np.random.seed(seed)
+    agentFn, envFn = factory(params, seed)
+    report = None
+    if queue != None:
+        report = lambda episodeNum, ret, steps: \
+            queue.put((runNum, episodeNum, ret, steps))
+    return runEpisodes(agentFn, envFn, numEpisodes, maxSteps, report)
+
+
+def runExperiment(factory, paramGrid, seeds, numEpisodes, maxSteps=10000,
+                  maxWorkers=None, callback=None):
+    "Does every run of the experiment; see the module documentation"
+    combinations = paramCombinations(paramGrid)
+    runs = [(c, s) for c in range(len(combinations)) for s in range(len(seeds))]
+    results = [{'params': params, 'seeds': list(seeds),
+                'returns': np.zeros((len(seeds), numEpisodes)),
+                'steps': np.zeros((len(seeds), numEpisodes), dtype=int)}
+               for params in combinations]
+
+    def store(runNum, outcome):
+        c, s = runs[runNum]
+        returns, lengths = outcome
+        results[c]['returns'][s, :len(returns)] = returns
+        results[c]['steps'][s, :len(lengths)] = lengths
+
+    def report(item):
+        runNum, episodeNum, ret, steps = item
+        c, s = runs[runNum]
+        callback(combinations[c], seeds[s], episodeNum, ret, steps)
+
+    if maxWorkers == 1:  # run serially in this process
+        queue = _Reporter(report) if callback != None else None
+        for runNum, (c, s) in enumerate(runs):
+            store(runNum, runOne(factory, combinations[c], seeds[s],
+                                 numEpisodes, maxSteps, queue, runNum))
+        return results
+
+    if maxWorkers == None:
+        maxWorkers = os.cpu_count() or 1
+    manager = queue = None
+    if callback != None:
+        manager = Manager()
+        queue = manager.Queue()
+    try:
+        with ProcessPoolExecutor(maxWorkers) as pool:
+            futures = {pool.submit(runOne, factory, combinations[c], seeds[s],
+                                   numEpisodes, maxSteps, queue, runNum): runNum
+                       for runNum, (c, s) in enumerate(runs)}
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, timeout=0.1,
+                                     return_when=FIRST_COMPLETED)
+                for future in done:
+                    store(futures[future], future.result())
+                if queue != None:
+                    drain(queue, report)
+        if queue != None:
+            drain(queue, report)
+    finally:
+        if manager != None:
+            manager.shutdown()
+    return results
+
+
+class _Reporter:
+    "Stands in for the queue when running serially, reporting each item at once"
+
+    def __init__(self, report):
+        self.put = report
+
+
+def drain(queue, report):
+    "Passes everything waiting in queue to report"
+    while True:
+        try:
+            item = queue.get_nowait()
+        except Empty:
+            return
+        report(item)
+
+
+def learningCurve(result, measure='returns'):
+    "Mean and standard error over seeds of each episode's measure"
+    values = np.asarray(result[measure], dtype=float)
+    mean = values.mean(axis=0)
+    stderr = values.std(axis=0) / np.sqrt(values.shape[0])
+    return mean, stderr
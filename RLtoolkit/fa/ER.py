@@ -33,12 +33,29 @@ class ERFA(FunctionApproximator):
         self.representation = self.representer.represent(input)
         return self.finalfa.faApproximate(self.representation)
 
+    def faApproximate_batch(self, inputs):
+        "Represents and approximates all the rows of inputs at once"
+        return self.finalfa.faApproximate_batch(
+            self.representer.represent_batch(inputs))
+
+    def faVersion(self):
+        versions = (self.finalfa.faVersion(), self.representer.faVersion())
+        if None in versions:
+            return None
+        return versions
+
     def faLearnLastApproximation(self, input, output, target):
-        print(("learn", input, output, target))
         self.finalfa.faLearnLastApproximation(self.representation, output,
                                               target)
         self.representer.representerLearnLast(input, self.representation, 1)
 
+    def faLearn(self, input, target):
+        "Represents once and lets the final fa approximate and learn in one pass"
+        self.representation = self.representer.represent(input)
+        output = self.finalfa.faLearn(self.representation, target)
+        self.representer.representerLearnLast(input, self.representation, 1)
+        return output
+
 
 ### An efficient ERFA separates the representing and learning functions even
 ### more than in an ordianry ERFA.  It expects a representation as its input.
@@ -47,9 +64,15 @@ class EfficientERFA(ERFA):
     def faApproximate(self, representation):
         return self.finalfa.faApproximate(representation)
 
+    def faApproximate_batch(self, representations):
+        return self.finalfa.faApproximate_batch(representations)
+
     def faLearnLastApproximation(self, representation, output, target):
         self.finalfa.faLearnLastApproximation(representation, output, target)
 
+    def faLearn(self, representation, target):
+        return self.finalfa.faLearn(representation, target)
+
 
 class SelectableOutputERFA(SelectableOutput, ERFA):
     def faApproximate1(self, input, outputnumber):
@@ -0,0 +1,215 @@
+### Checkpoints for function approximators and representers.
+###
+###   saveCheckpoint(fa, filename)
+###   fa = loadCheckpoint(filename, mode='c')
+###
+### Any function approximator or representer from RLtoolkit (Adaline, Madaline,
+### ERFA, TileCoderRepresenter, MultiRepresenter, ...) can be saved, together with
+### everything it refers to: the representer and final fa of an ERFA, a tilecoder's
+### tiler and collision table, and so on.
+###
+### A checkpoint file is a small header followed by raw arrays.  The header is
+###
+###   8 bytes    the magic string RLTKFA01
+###   8 bytes    the length of the JSON description, little endian
+###   JSON       the class and attributes of each object, i.e., its configuration,
+###              with every array replaced by its dtype, shape and position
+###
+### and then the arrays themselves, each starting on a 64 byte boundary.  Numeric
+### lists longer than _minlistarray elements (such as the data of a Python
+### CollisionTable) are stored as arrays too and turned back into lists on loading.
+###
+### Loading memory-maps the file, so the weights are not read until they are used
+### and processes loading the same checkpoint share their pages.  The mode is
+### that of numpy.memmap:
+###
+###   'c'   copy on write (the default): learning changes only this process's copy
+###   'r'   read only: the weights cannot be changed at all
+###   'r+'  learning writes straight through to the checkpoint file
+###
+### Arrays that a class only uses as scratch space (named in its scratcharrays
+### class attribute, e.g., MultiRepresenter.buffer) are not saved or mapped; they
+### are recorded by dtype and shape and newly allocated on loading, so that a
+### read only checkpoint can still be used, and an 'r+' one isn't written to by
+### every represent.
+###
+### An object, list, dict or array referred to from several places is saved once,
+### and the other places refer back to it ('ref'), so that after loading they still
+### share it (e.g., a collision table used by two representers).
+###
+### Only classes defined in RLtoolkit are recreated when loading.
+
+import importlib
+import json
+import types
+import numpy as np
+
+_magic = b'RLTKFA01'
+_alignment = 64
+_minlistarray = 64
+
+
+def saveCheckpoint(obj, filename):
+    "Writes obj, its configuration and its arrays, to the checkpoint file filename"
+    arrays = []
+    description = json.dumps({'version': 2,
+                              'object': _describe(obj, arrays, {})}).encode('utf-8')
+    with open(filename, 'wb') as f:
+        f.write(_magic)
+        f.write(len(description).to_bytes(8, 'little'))
+        f.write(description)
+        position = len(_magic) + 8 + len(description)
+        for array in arrays:
+            start = _aligned(position)
+            f.write(b'\0' * (start - position))
+            f.write(array.tobytes())
+            position = start + array.nbytes
+
+
+def loadCheckpoint(filename, mode='c'):
+    "Returns the object saved in filename, with its arrays memory-mapped"
+    header, datastart = _readHeader(filename)
+    data = np.memmap(filename, dtype=np.uint8, mode=mode)
+    return _rebuild(header['object'], data, datastart, {})
+
+
+def checkpointHeader(filename):
+    "Returns the JSON description at the start of a checkpoint file, as a dict"
+    return _readHeader(filename)[0]
+
+
+def _readHeader(filename):
+    with open(filename, 'rb') as f:
+        if f.read(len(_magic)) != _magic:
+            raise ValueError(filename + " is not a function approximator checkpoint")
+        length = int.from_bytes(f.read(8), 'little')
+        header = json.loads(f.read(length).decode('utf-8'))
+    return header, _aligned(len(_magic) + 8 + length)
+
+
+def _aligned(position):
+    return (position + _alignment - 1) // _alignment * _alignment
+
+
+def _describe(value, arrays, memo):
+    """Returns a JSON-able description of value, adding its arrays to arrays;
+    memo maps the id of each object already described to its number"""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    elif isinstance(value, np.generic):
+        return value.item()
+    elif isinstance(value, tuple):
+        return {'tuple': [_describe(v, arrays, memo) for v in value]}
+    elif isinstance(value, types.ModuleType):
+        return {'module': value.__name__}
+    key = id(value)
+    if key in memo:
+        return {'ref': memo[key][0]}
+    memo[key] = (len(memo), value)  # value is kept so its id isn't reused
+    description = _describeShared(value, arrays, memo)
+    description['id'] = memo[key][0]
+    return description
+
+
+def _describeShared(value, arrays, memo):
+    "The description of a value that may be referred to from several places"
+    if isinstance(value, np.ndarray):
+        return _describeArray(np.ascontiguousarray(value), arrays, False)
+    elif isinstance(value, list) and len(value) >= _minlistarray and \
+            all(isinstance(v, (int, float)) and not isinstance(v, bool)
+                for v in value):
+        return _describeArray(np.array(value), arrays, True)
+    elif isinstance(value, list):
+        return {'list': [_describe(v, arrays, memo) for v in value]}
+    elif isinstance(value, dict):
+        return {'dict': [[_describe(k, arrays, memo), _describe(v, arrays, memo)]
+                         for k, v in value.items()]}
+    elif hasattr(value, '__dict__') and _ours(type(value).__module__):
+        cls = type(value)
+        scratch = getattr(cls, 'scratcharrays', ())
+        return {'class': cls.__module__ + ':' + cls.__qualname__,
+                'state': {k: _describeScratch(v) if k in scratch
+                          else _describe(v, arrays, memo)
+                          for k, v in vars(value).items()}}
+    else:
+        raise TypeError("Can't checkpoint " + repr(value))
+
+
+def _describeArray(array, arrays, aslist):
+    position = 0
+    for a in arrays:
+        position = _aligned(position) + a.nbytes
+    arrays.append(array)
+    return {'array': {'dtype': array.dtype.str, 'shape': list(array.shape),
+                      'offset': _aligned(position), 'aslist': aslist}}
+
+
+def _describeScratch(array):
+    return {'scratch': {'dtype': array.dtype.str, 'shape': list(array.shape)}}
+
+
+def _rebuild(description, data, datastart, memo):
+    """Recreates the value described by description, mapping its arrays from
+    data; memo maps the number of each object already recreated to it"""
+    if isinstance(description, list):  # version 1 lists
+        return [_rebuild(d, data, datastart, memo) for d in description]
+    elif not isinstance(description, dict):
+        return description
+    elif 'ref' in description:
+        return memo[description['ref']]
+    elif 'array' in description:
+        info = description['array']
+        dtype = np.dtype(info['dtype'])
+        shape = tuple(info['shape'])
+        start = datastart + info['offset']
+        nbytes = dtype.itemsize * int(np.prod(shape))
+        array = data[start:start + nbytes].view(dtype).reshape(shape)
+        if info['aslist']:
+            array = array.tolist()
+        return _remember(memo, description, array)
+    elif 'scratch' in description:
+        info = description['scratch']
+        return np.zeros(tuple(info['shape']), dtype=np.dtype(info['dtype']))
+    elif 'tuple' in description:
+        return tuple(_rebuild(d, data, datastart, memo)
+                     for d in description['tuple'])
+    elif 'list' in description:
+        result = _remember(memo, description, [])
+        result.extend(_rebuild(d, data, datastart, memo)
+                      for d in description['list'])
+        return result
+    elif 'dict' in description:
+        result = _remember(memo, description, {})
+        for k, v in description['dict']:
+            result[_rebuild(k, data, datastart, memo)] = \
+                _rebuild(v, data, datastart, memo)
+        return result
+    elif 'module' in description:
+        return importlib.import_module(_checked(description['module']))
+    else:
+        modulename, classname = description['class'].split(':')
+        cls = importlib.import_module(_checked(modulename))
+        for name in classname.split('.'):
+            cls = getattr(cls, name)
+        obj = _remember(memo, description, cls.__new__(cls))
+        for k, v in description['state'].items():
+            setattr(obj, k, _rebuild(v, data, datastart, memo))
+        return obj
+
+
+def _remember(memo, description, value):
+    "Records value as the object numbered in description (if it is numbered)"
+    if 'id' in description:
+        memo[description['id']] = value
+    return value
+
+
+def _ours(modulename):
+    return modulename == 'RLtoolkit' or modulename.startswith('RLtoolkit.')
+
+
+def _checked(modulename):
+    if not _ours(modulename):
+        raise ValueError("Checkpoint refers to " + modulename +
+                         ", which is not part of RLtoolkit")
+    return modulename
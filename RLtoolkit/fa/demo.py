@@ -5,6 +5,7 @@ from RLtoolkit.Quickgraph.graph import *
 from math import *
 from .fa import *
 from .tilecoder import *
+from .grid import evaluate_grid
 
 window = None
 black = gColorBlack(True)
@@ -165,9 +166,10 @@ class DemoWindow(Graph):
         global lines, oldlines, xresolution, inputarray, functionapproximator
         oldlines = lines
         nlines = []
+        values = evaluate_grid(functionapproximator, [[0, 1]], xresolution)
         for i in range(xresolution):
             x = float(i) / xresolution
-            fline = [x, functionapproximator.faApproximate([x])]
+            fline = [x, float(values[i])]
             nlines.append(fline)
         nlines.append(fline)  # repeat last point so last section draws
         lines = [nlines]
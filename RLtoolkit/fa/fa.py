@@ -23,6 +23,9 @@
 ### Mix in  CHECKINPUTRANGE and CHECKINPUTDIMENSIONALITY to get your inputs 
 ### checked automatically.
 
+import numpy as np
+
+
 class CheckInputDimensionality:
     def __init__(self, numinputs=1):
         self.numinputs = numinputs
@@ -52,6 +55,7 @@ class FunctionApproximator(CheckInputDimensionality):
            Surprisingly, this suffices for almost all function approximators."""
         output = self.faApproximate(input)
         self.faLearnLastApproximation(input, output, target)
+        return output
 
     def faApproximate(self, input):
         "The default"
@@ -64,3 +68,12 @@ class FunctionApproximator(CheckInputDimensionality):
     def normalizedlearningrate(self, input):
         "Default for a functionapproximator just returns its learningrate slot's value"
         return self.learningrate
+
+    def faApproximate_batch(self, inputs):
+        "The default approximates each input (row of inputs) in turn"
+        return np.array([self.faApproximate(input) for input in inputs])
+
+    def faVersion(self):
+        """Changes whenever learning changes what the approximator computes;
+           None if the approximator doesn't keep track"""
+        return getattr(self, 'weightversion', None)
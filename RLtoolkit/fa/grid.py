@@ -0,0 +1,86 @@
+### Evaluating a function approximator or representer over a grid of inputs,
+### e.g., to draw its value surface or a feature's receptive field:
+###
+###   evaluate_grid(fa, ranges, resolution)
+###
+### ranges gives a (min max) pair for each input dimension that is varied (one or
+### two of them), and resolution the number of points along each (a number, or a
+### list with one per dimension).  Along each dimension the points start at min
+### and step by (max - min) / resolution, so max itself is not included.  The whole
+### grid is built as one array and passed to the batched path (faApproximate_batch
+### or represent_batch), and the result is returned as an array with one axis per
+### varied dimension: result[i, j] is the value at the i'th point along the first
+### dimension and the j'th along the second.
+###
+### For a representer, the result is whether feature is active at each point, or
+### the number of active features if no feature is given.
+###
+### Results are cached, keyed on the arguments and on the object's faVersion(), so
+### redrawing an unchanged approximator costs nothing.  The cached arrays are
+### returned read only.
+
+import weakref
+import numpy as np
+from .representer import Representer
+
+_cache = weakref.WeakKeyDictionary()  # object -> {arguments: (version, result)}
+
+
+def gridPoints(ranges, resolution, dimensions=None, baseinput=None,
+               numinputs=None):
+    """Returns the (N x numinputs) array of grid points, the grid's shape, with
+       the first varied dimension changing slowest"""
+    if not isinstance(resolution, (tuple, list)):
+        resolution = [resolution for r in ranges]
+    if dimensions == None:
+        dimensions = list(range(len(ranges)))
+    if numinputs == None:
+        numinputs = max(dimensions) + 1
+    axes = [lo + (hi - lo) * np.arange(res) / float(res)
+            for (lo, hi), res in zip(ranges, resolution)]
+    shape = tuple(len(axis) for axis in axes)
+    points = np.empty((int(np.prod(shape)), numinputs))
+    if baseinput is None:
+        points[:] = 0.0
+    else:
+        points[:] = baseinput
+    mesh = np.meshgrid(*axes, indexing='ij')
+    for d, values in zip(dimensions, mesh):
+        points[:, d] = values.ravel()
+    return points, shape
+
+
+def evaluate_grid(fa, ranges, resolution, feature=None, dimensions=None,
+                  baseinput=None):
+    """Evaluates fa (a function approximator or representer) at each point of the
+       grid; dimensions says which inputs are varied, and baseinput gives the
+       values of the others"""
+    key = (_frozen(ranges), _frozen(resolution), feature, _frozen(dimensions),
+           _frozen(baseinput))
+    version = fa.faVersion()
+    if version != None:
+        cached = _cache.setdefault(fa, {}).get(key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+    points, shape = gridPoints(ranges, resolution, dimensions, baseinput,
+                               fa.numinputs)
+    if isinstance(fa, Representer):
+        representations = fa.represent_batch(points)
+        if feature == None:
+            result = (representations >= 0).sum(axis=1)
+        else:
+            result = (representations == feature).any(axis=1)
+    else:
+        result = np.asarray(fa.faApproximate_batch(points))
+    result = result.reshape(shape + result.shape[1:])
+    if version != None:
+        result.flags.writeable = False
+        _cache[fa][key] = (version, result)
+    return result
+
+
+def _frozen(value):
+    "A hashable version of a (possibly nested) list of numbers"
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return tuple(_frozen(v) for v in value)
+    return value
@@ -47,7 +47,9 @@
 ### resolution of 10 intervals. 
 
 from random import *
+import numpy as np
 from .representer import *
+from .grid import evaluate_grid
 
 normaldensity0 = normaldensity(0)
 
@@ -124,22 +126,13 @@ def draw2dreceptivefield(context, repr, feature, \
     if inputdescriptor == None:
         inputdescriptor = repr.inputdescriptor
     black = gColorBlack(context)
-    f = dimensionstovary[0]
     firstdescriptor = inputdescriptor[dimensionstovary[0]]
     seconddescriptor = inputdescriptor[dimensionstovary[1]]
     min1, max1, num1 = firstdescriptor
     min2, max2, num2 = seconddescriptor
-    numinputs = repr.n  # repr.numinputs
-    array = [0 for i in range(numinputs)]
+    active = evaluate_grid(repr, [[min1, max1], [min2, max2]], 50, feature,
+                           dimensionstovary)
     gClear(context)
     gdOutlineRect(context, 0, 0, 51, 51, black)
-    x = min1
-    for dx in range(1, 50):
-        array[0] = x
-        y = min2
-        for dy in range(1, 50):
-            array[1] = y
-            if feature in repr.represent(array):
-                gdDrawPoint(context, dx, dy, black)
-            y += float(max2 - min2) / 50.0
-        x += float(max1 - min1) / 50.0
+    for dx, dy in zip(*np.nonzero(active)):
+        gdDrawPoint(context, dx + 1, dy + 1, black)
@@ -1,15 +1,57 @@
 ### This file contains definitions for linear or singlecell function approximators.
-
+###
+### The weights are kept in NumPy arrays.  Besides the generic FA functions, the
+### linear approximators whose input is a list of active input indices learn with
+### a fused kernel (fusedLearn below) that gathers the active weights, computes the
+### prediction and its error, and scatters the update, all in one call:
+###
+###    functionapproximator.faLearnFused(input, target, stepsize=None)
+###
+### It returns the prediction from before the update, just as faApproximate would
+### have, and faLearn uses it.  The stepsize defaults to the normalizedlearningrate.
+### The kernels are written with NumPy only (a gather, a sum and np.add.at); there
+### is no compiled C version, as the package builds no extensions.
+###
+### They can also approximate a whole batch of inputs at once, given as a 2D array
+### of active input indices padded with -1 (as made by representer.represent_batch):
+###
+###    functionapproximator.faApproximate_batch(inputs)
+###
+### Every change to the weights increments the approximator's weightversion, so
+### that results computed from the weights (e.g., by evaluate_grid) can be cached.
+
+import numpy as np
 from .fa import *
 
 
+def fusedLearn(weights, indices, target, stepsize):
+    """Predicts with the sum of weights[indices], then adds stepsize times the
+       error to each of those weights (once per occurrence of an index, as the
+       learning loops do); returns the prediction"""
+    indices = np.asarray(indices, dtype=np.intp)
+    prediction = weights[indices].sum()
+    np.add.at(weights, indices, stepsize * (target - prediction))
+    return prediction
+
+
+def fusedLearnLayer(weights, indices, targets, stepsize):
+    """Like fusedLearn, for a (numoutputs x numinputs) array of weights and a
+       target for each output; returns the array of predictions"""
+    indices = np.asarray(indices, dtype=np.intp)
+    predictions = weights[:, indices].sum(axis=1)
+    errors = stepsize * (np.asarray(targets, dtype=float) - predictions)
+    np.add.at(weights, (slice(None), indices), errors[:, np.newaxis])
+    return predictions
+
+
 class SingleUnitFunctionApproximator(FunctionApproximator):
     "Foundation of all singleunit connectionist function approximators"
 
     def __init__(self, numinputs=1):
         FunctionApproximator.__init__(self, numinputs, 1)
         self.initialweight = 0
-        self.weights = [self.initialweight for i in range(self.numinputs)]
+        self.weights = np.zeros(self.numinputs)
+        self.weightversion = 0  # incremented whenever the weights change
         self.learningrate = 1
         self.faInit()
 
@@ -17,24 +59,37 @@ class SingleUnitFunctionApproximator(FunctionApproximator):
     ### of a bias, cause one input always to be active .
 
     def faInit(self):
-        for i in range(self.numinputs):
-            self.weights[i] = self.initialweight
+        self.weights[:] = self.initialweight
+        self.weightversion += 1
 
 
 class Adaline(SingleUnitFunctionApproximator):
     "An adaptive linear element  the delta rule, WidrowHoff rule"
 
     def faApproximate(self, input):
-        num = 0
-        for i in input:
-            num += self.weights[i]
-        return num
+        return self.weights[np.asarray(input, dtype=np.intp)].sum()
 
     def faLearnLastApproximation(self, input, output, target):
         learningrateerror = self.normalizedlearningrate(input) * (
         target - output)
-        for i in input:
-            self.weights[i] += learningrateerror
+        np.add.at(self.weights, np.asarray(input, dtype=np.intp),
+                  learningrateerror)
+        self.weightversion += 1
+
+    def faLearnFused(self, input, target, stepsize=None):
+        "Approximates and learns in one pass; returns the pre-update approximation"
+        if stepsize == None:
+            stepsize = self.normalizedlearningrate(input)
+        self.weightversion += 1
+        return fusedLearn(self.weights, input, target, stepsize)
+
+    def faApproximate_batch(self, inputs):
+        "Approximations for each row of active indices (padded with -1)"
+        indices = np.asarray(inputs, dtype=np.intp)
+        return np.where(indices >= 0, self.weights[indices], 0.0).sum(axis=1)
+
+    def faLearn(self, input, target):
+        return self.faLearnFused(input, target)
 
 
 class SingleLayerFunctionApproximator(FunctionApproximator):
@@ -43,8 +98,8 @@ class SingleLayerFunctionApproximator(FunctionApproximator):
     def __init__(self, numinputs=1, numoutputs=1):
         FunctionApproximator.__init__(self, numinputs, numoutputs)
         self.initialweight = 0
-        self.weights = [[self.initialweight for i in range(self.numinputs)] for
-                        j in range(self.numoutputs)]
+        self.weights = np.zeros((self.numoutputs, self.numinputs))
+        self.weightversion = 0  # incremented whenever the weights change
         self.learningrate = 1
         self.faInit()
 
@@ -52,24 +107,36 @@ class SingleLayerFunctionApproximator(FunctionApproximator):
     ### of a bias, cause one input always to be active .
 
     def faInit(self):
-        for j in range(self.numoutputs):
-            for i in range(self.numinputs):
-                self.weights[j][i] = self.initialweight
+        self.weights[:, :] = self.initialweight
+        self.weightversion += 1
 
 
 class Madaline(SingleLayerFunctionApproximator):
     def faApproximate(self, input):
-        faa = 0
-        for j in range(self.numoutputs):
-            for i in input:
-                faa += self.weights[j][i]
+        return self.weights[:, np.asarray(input, dtype=np.intp)].sum(axis=1)
 
     def faLearnLastApproximation(self, input, output, target):
-        for j in range(self.numoutputs):
-            learningrateerror = self.normalizedlearningrate(input) * (
-            target[j] - output[j])
-            for i in input:
-                self.weights[j][i] += learningrateerror
+        errors = np.asarray(target, dtype=float) - np.asarray(output)
+        learningrateerrors = self.normalizedlearningrate(input) * errors
+        np.add.at(self.weights, (slice(None), np.asarray(input, dtype=np.intp)),
+                  learningrateerrors[:, np.newaxis])
+        self.weightversion += 1
+
+    def faLearnFused(self, input, target, stepsize=None):
+        "Approximates and learns in one pass; returns the pre-update approximation"
+        if stepsize == None:
+            stepsize = self.normalizedlearningrate(input)
+        self.weightversion += 1
+        return fusedLearnLayer(self.weights, input, target, stepsize)
+
+    def faApproximate_batch(self, inputs):
+        "(N x numoutputs) approximations for each row of active indices (padded with -1)"
+        indices = np.asarray(inputs, dtype=np.intp)
+        values = np.where(indices >= 0, self.weights[:, indices], 0.0)
+        return values.sum(axis=2).T
+
+    def faLearn(self, input, target):
+        return self.faLearnFused(input, target)
 
 
 class SelectableOutput:
@@ -85,23 +152,27 @@ class SelectableOutput:
         """The default falearn1 just approximates and learns the approximation.
            Surprisingly, this suffices for almost all function approximators."""
         scalaroutput = self.faApproximate1(input, outputnumber)
-        return faLearnLastApproximation1(input, scalaroutput, scalartarget,
-                                         outputnumber)
+        return self.faLearnLastApproximation1(input, scalaroutput,
+                                              scalartarget, outputnumber)
 
 
 class SelectableOutputMadaline(Madaline, SelectableOutput):
     def faApproximate1(self, input, outputnumber):
-        faa = 0
-        for i in input:
-            faa += self.weights[outputnumber][i]
-        return faa
+        return self.weights[outputnumber][np.asarray(input, dtype=np.intp)].sum()
 
     def faLearnLastApproximation1(self, input, scalaroutput, scalartarget,
                                   outputnumber):
         learningrateerror = self.normalizedlearningrate(input) * (
         scalartarget - scalaroutput)
-        for i in input:
-            self.weights[outputnumber][i] += learningrateerror
+        np.add.at(self.weights[outputnumber], np.asarray(input, dtype=np.intp),
+                  learningrateerror)
+        self.weightversion += 1
+
+    def falearn1(self, input, scalartarget, outputnumber):
+        "Fused version: learns the one output in one pass, returns its approximation"
+        self.weightversion += 1
+        return fusedLearn(self.weights[outputnumber], input, scalartarget,
+                          self.normalizedlearningrate(input))
 
 
 class NormalizedStepSize:
@@ -1,32 +1,72 @@
 ### A multirepresenter is a set of representers that concatenate all the
 ### representations together to make one big representation.
+###
+### The features of each representer are numbered after those of the representers
+### before it, i.e., each representer's indices are offset by the total
+### numfeatures of the earlier ones.  The combined representation is kept in one
+### int array, allocated once, big enough for all the representers' maxactive
+### features.  Each representer writes its active indices, already offset, directly
+### into its part of that array, so representing an input allocates no new lists.
+### The array returned by represent is a view of this buffer and is overwritten
+### by the next call.
 
+import numpy as np
 from .representer import *
 
 
 class MultiRepresenter(Representer):
+    scratcharrays = ('buffer',)  # not saved in checkpoints
+
     def __init__(self, representers):
-        Representer.__init__(self)
         self.representers = representers
-        numout = 0
-        for r in self.representers:  # should we init each representer?
-            numout += r.numoutputs
-        self.numoutputs = numout
+        first = self.representers[0]
+        Representer.__init__(self, first.numinputs, 0, first.inputdescriptor)
+        self.offsets = []  # index offset of each representer's features
+        numfeatures = 0
+        maxactive = 0
+        for r in self.representers:
+            self.offsets.append(numfeatures)
+            numfeatures += r.numfeatures
+            maxactive += r.maxactive
+        self.numoutputs = self.numfeatures = numfeatures
+        self.maxactive = maxactive
+        self.buffer = np.zeros(self.maxactive, dtype=np.intp)
+        self.numactive = 0  # number of active features in the last representation
 
-    def represent(self, input):
-        offset = 0
-        finalrep = []
+    def faInit(self):
         for r in self.representers:
-            rep = r.represent(input)
-            for c in rep:
-                c[0] += offset
-            offset += r.numoutputs
-            finalrep.append(rep)
-        self.representation = rep
-        return rep
+            r.faInit()
+
+    def faVersion(self):
+        versions = tuple(r.faVersion() for r in self.representers)
+        if None in versions:
+            return None
+        return versions
+
+    def loadRepresentation(self, output, startelement, input, offset=0):
+        "Loads each representer's active features, one after another, into output"
+        element = startelement
+        for r, roffset in zip(self.representers, self.offsets):
+            element += r.loadRepresentation(output, element, input,
+                                            offset + roffset)
+        return element - startelement
+
+    def represent(self, input):
+        self.numactive = self.loadRepresentation(self.buffer, 0, input)
+        return self.buffer[:self.numactive]
+
+    def represent_batch(self, inputs):
+        """Represents each row of inputs; each representer fills its own block of
+           maxactive columns, with -1 marking unused entries"""
+        output = np.empty((len(inputs), self.maxactive), dtype=np.intp)
+        column = 0
+        for r, roffset in zip(self.representers, self.offsets):
+            block = output[:, column:column + r.maxactive]
+            block[...] = r.represent_batch(inputs)
+            block[block >= 0] += roffset
+            column += r.maxactive
+        return output
 
     def numlayers(self):
-        num = 0
-        for r in self.representers:
-            num += r.numlayers
-        return num
+        "Most features that can be active at once, over all the representers"
+        return self.maxactive
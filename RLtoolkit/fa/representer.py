@@ -45,7 +45,23 @@
 ### meaning of the resolution number depends on the particular representer of course,
 ### but the general idea is to specify how finely the range of the input is to be
 ### be split up  how fine a distinction the representer's representation will make.
+###
+### Representers whose output is a list of active feature indices also describe
+### their output with two numbers: "numfeatures", the number of distinct features
+### (the indices run from 0 to numfeatures-1), and "maxactive", the largest number
+### of features that can be active at once.  Such representers can write their
+### output into an existing int array instead of returning a new one, and can
+### represent a whole batch of inputs at once:
+###
+###   representer.loadRepresentation(output, startelement, input, offset)
+###   representer.represent_batch(inputs)
+###
+### The first writes the active indices, each plus offset, into output starting at
+### startelement and returns how many it wrote (like loadtiles).  The second takes
+### an (N x numinputs) array and returns an (N x maxactive) int array of active
+### indices, with -1 marking unused entries.
 
+import numpy as np
 from .fa import *
 
 
@@ -70,6 +86,9 @@ class Representer(CheckInputDimensionality, CheckInputRange):
         self.inputdescriptor = inputdescriptor
         if self.numinputs == None:
             self.numinputs = len(self.inputdescriptor)
+        self.numfeatures = numoutputs  # number of distinct output features
+        self.maxactive = numoutputs  # most features active at once
+        self.weightversion = 0  # incremented whenever the representation changes
 
     def representerLearn(self, input, weighting):
         "The default representerLearn method (suffices for most representers)"
@@ -86,6 +105,27 @@ class Representer(CheckInputDimensionality, CheckInputRange):
     def represent(self, input):
         return input[:]  # return a copy of the input if no better method
 
+    def loadRepresentation(self, output, startelement, input, offset=0):
+        """Writes the active features for input, plus offset, into the int array
+           output starting at startelement; returns the number written"""
+        rep = self.represent(input)
+        num = len(rep)
+        output[startelement:startelement + num] = rep
+        output[startelement:startelement + num] += offset
+        return num
+
+    def faVersion(self):
+        "Changes whenever learning or reinitializing changes the representation"
+        return getattr(self, 'weightversion', None)
+
+    def represent_batch(self, inputs):
+        """Represents each row of inputs; returns an (N x maxactive) int array of
+           active features, with -1 marking unused entries"""
+        output = np.full((len(inputs), self.maxactive), -1, dtype=np.intp)
+        for i in range(len(inputs)):
+            self.loadRepresentation(output[i], 0, inputs[i])
+        return output
+
 
 ### The effect of a bias can be added using the REPRESENTERWITHBIAS mixin. 
 ### This mixin causes the last output dimension to be taken over to serve as the 
@@ -1,6 +1,53 @@
+### Random representation (RR) networks for binary inputs.
+###
+### The weights of the LTUs and the inputs are both stored bit-packed, 64 input
+### bits to a uint64 word, so that the number of matches between an input and
+### every LTU can be counted with one XOR and a popcount over the whole network.
+### Bit i of an input lives in bit (i % 64) of word (i // 64); unused bits of the
+### last word are always zero in both the weights and the packed inputs, so they
+### never count as mismatches.
+
 from random import *
+import numpy as np
 from .representer import *
 
+_wordbits = 64
+_wordmask = (1 << _wordbits) - 1
+
+if hasattr(np, 'bitwise_count'):
+    def popcount(words):
+        "Number of set bits in each element of an array of uint64 words"
+        return np.bitwise_count(words)
+else:
+    _bytecounts = np.array([bin(i).count('1') for i in range(256)],
+                           dtype=np.uint8)
+
+    def popcount(words):
+        "Number of set bits in each element of an array of uint64 words"
+        words = np.ascontiguousarray(words, dtype=np.uint64)
+        bytecounts = _bytecounts[words.view(np.uint8)]
+        return bytecounts.reshape(words.shape + (8,)).sum(axis=-1,
+                                                           dtype=np.uint8)
+
+
+def numwords(numbits):
+    "Number of uint64 words needed to hold numbits bits"
+    return (numbits + _wordbits - 1) // _wordbits
+
+
+def packbits(bits, numbits):
+    """Packs the last axis of an array of binary values (length numbits) into
+       uint64 words, giving an array of shape bits.shape[:-1] + (numwords,)"""
+    bits = np.asarray(bits)
+    if bits.shape[-1] != numbits:
+        raise ValueError("Input has %d bits, expected %d" %
+                         (bits.shape[-1], numbits))
+    nwords = numwords(numbits)
+    padded = np.zeros(bits.shape[:-1] + (nwords * _wordbits,), dtype=np.uint8)
+    padded[..., :numbits] = bits != 0
+    packed = np.packbits(padded, axis=-1, bitorder='little')
+    return packed.view('<u8').astype(np.uint64, copy=False)
+
 
 class BinaryRandomRepresenter(Representer):
     "Standard RR LTU network for binary inputs"
@@ -8,24 +55,54 @@ class BinaryRandomRepresenter(Representer):
     def __init__(self, numinputs, numoutputs, inputdescriptor=None):
         Representer.__init__(self, numinputs, numoutputs, inputdescriptor)
         self.beta = 0.6
-        v = [[0 for i in range(self.numinputs)] for j in range(
-            self.numoutputs)]  # weights of LTUs                     # weights of the LTUs
+        self.numwords = numwords(self.numinputs)
+        self.v = np.zeros((self.numoutputs, self.numwords),
+                          dtype=np.uint64)  # packed weights of the LTUs
         self.faInit()
 
     def faInit(self):
         "Initializes binaryrandomrepresenter data structures without recreating them"
         for j in range(self.numoutputs):
-            for i in range(self.numinputs):
-                self.v[j][i] = randint(2)
+            bits = getrandbits(self.numinputs)
+            for w in range(self.numwords):
+                self.v[j, w] = (bits >> (w * _wordbits)) & _wordmask
+        self.weightversion += 1
+
+    def packInput(self, input):
+        "Packs one binary input vector (or a 2D batch of them) into uint64 words"
+        return packbits(input, self.numinputs)
+
+    def numMatches(self, packedinput):
+        """Number of input bits matching each LTU's weights, for a packed input
+           (numoutputs values) or a packed batch (N x numoutputs)"""
+        packedinput = np.asarray(packedinput, dtype=np.uint64)
+        if packedinput.ndim == 1:
+            mismatches = popcount(self.v ^ packedinput).sum(axis=-1)
+        else:
+            mismatches = popcount(
+                self.v[np.newaxis, :, :] ^ packedinput[:, np.newaxis, :]).sum(
+                axis=-1)
+        return self.numinputs - mismatches
 
     def represent(self, input):
-        "Represents the binary input vector as a list of active feature numbers"
-        replist = []
-        for j in range(self.numoutputs):
-            nummatches = 0
-            for i in range(self.numinputs):
-                if input[i] == self.v[j][i]:
-                    nummatches += 1
-            if nummatches >= self.numinputs * self.beta:
-                replist.append(j)
-        return replist
+        "Represents the binary input vector as an array of active feature numbers"
+        matches = self.numMatches(self.packInput(input))
+        return np.flatnonzero(matches >= self.numinputs * self.beta)
+
+    def represent_batch(self, inputs, chunksize=256):
+        """Represents each row of the (N x numinputs) binary array inputs.  Returns
+           an (N x numoutputs) array of active feature numbers, each row sorted
+           and padded at the end with -1."""
+        packed = self.packInput(np.asarray(inputs))
+        n = packed.shape[0]
+        result = np.empty((n, self.numoutputs), dtype=np.intp)
+        features = np.arange(self.numoutputs)
+        for start in range(0, n, chunksize):  # bound the XOR temporary's size
+            stop = min(n, start + chunksize)
+            active = self.numMatches(packed[start:stop]) >= \
+                     self.numinputs * self.beta
+            rows = np.where(active, features, self.numoutputs)
+            rows.sort(axis=1)
+            rows[rows == self.numoutputs] = -1
+            result[start:stop] = rows
+        return result
@@ -1,43 +1,114 @@
-### 
-### tilecoder's are a particular kind of ERFA 
 ###
+### tilecoder's are a particular kind of ERFA
+###
+### A TileCoderRepresenter rescales its input with a precomputed scaling and
+### offset vector, so that each dimension's range is split into as many unit
+### intervals as its resolution, and then tiles it with a tiler.  The tiler is
+### the backend that does the tiling:
+###
+###   PythonTiler()   the pure Python routines in RLtoolkit.Tiles.tiles (default)
+###   VectorTiler()   RLtoolkit.Tiles.tiles.tilesbatch, which tiles a whole batch
+###                   of inputs with array operations
+###
+### The two tilers give identical tiles.  Hashing collisions are handled by giving
+### the representer a collision table (of size memorysize) as ctable; otherwise
+### they are ignored.
 
+import numpy as np
 import RLtoolkit.Tiles.tiles as tiles
 from .representer import *
 from .ER import *
 
 
+class PythonTiler:
+    "Tiles with the pure Python tiling routines"
+
+    def __init__(self):
+        self.tilesmodule = tiles
+
+    def loadtiles(self, output, startelement, numtilings, memctable, floats,
+                  ints=[]):
+        self.tilesmodule.loadtiles(output, startelement, numtilings, memctable,
+                                   floats, ints)
+
+    def tilesbatch(self, numtilings, memctable, floats, ints=[]):
+        "Tiles each row of the 2D array floats; returns an (N x numtilings) array"
+        tlist = np.empty((len(floats), numtilings), dtype=np.intp)
+        for i in range(len(floats)):
+            self.loadtiles(tlist[i], 0, numtilings, memctable,
+                           floats[i].tolist(), ints)
+        return tlist
+
+
+class VectorTiler(PythonTiler):
+    "Tiles whole batches of inputs at once with array operations"
+
+    def loadtiles(self, output, startelement, numtilings, memctable, floats,
+                  ints=[]):
+        tlist = tiles.tilesbatch(numtilings, memctable, [floats], ints)
+        output[startelement:startelement + numtilings] = tlist[0]
+
+    def tilesbatch(self, numtilings, memctable, floats, ints=[]):
+        return tiles.tilesbatch(numtilings, memctable, floats, ints)
+
+
 class TileCoderRepresenter(Representer):
     "A basic tilecoder representer"
 
     def __init__(self, inputdescriptor, numoutputs=8, memorysize=1000,
-                 hashingset=None):
+                 hashingset=None, tiler=None, ctable=None):
         Representer.__init__(self, len(inputdescriptor), numoutputs,
                              inputdescriptor)
         self.memorysize = memorysize
+        self.numfeatures = memorysize
+        self.maxactive = numoutputs  # one active tile per tiling
         slist = []
+        olist = []
         for min, max, res in self.inputdescriptor:
             slist.append(float(res) / (max - min))
-        self.scaling = slist
+            olist.append(- min * slist[-1])
+        self.scaling = np.array(slist)  # input is rescaled to input * scaling + offset
+        self.offset = np.array(olist)
+        if hashingset == None:
+            hashingset = []
         self.hashingset = hashingset
+        if tiler == None:
+            tiler = PythonTiler()
+        self.tiler = tiler
+        if ctable == None:
+            self.memctable = memorysize
+        else:
+            self.memctable = ctable
+
+    def scale(self, input):
+        "Rescales an input (or a 2D array of inputs, one per row) for tiling"
+        return np.asarray(input, dtype=float) * self.scaling + self.offset
 
     def represent(self, input):
-        nlist = []
-        i = 0
-        for scalingi in self.scaling:
-            nlist.append(input[i] * scalingi)
-            i += 1
-        if self.hashingset == None:
-            return tiles.tiles(self.numoutputs, self.memorysize, nlist)
-        else:
-            return tiles.tiles(self.numoutputs, self.memorysize, nlist,
-                               self.hashingset)
+        tlist = [0] * self.numoutputs
+        self.loadRepresentation(tlist, 0, input)
+        return tlist
+
+    def loadRepresentation(self, output, startelement, input, offset=0):
+        "Loads the tiles for input, plus offset, straight into output"
+        self.tiler.loadtiles(output, startelement, self.numoutputs,
+                             self.memctable, self.scale(input).tolist(),
+                             self.hashingset)
+        if offset != 0:
+            for j in range(startelement, startelement + self.numoutputs):
+                output[j] += offset
+        return self.numoutputs
+
+    def represent_batch(self, inputs):
+        "Returns the (N x numtilings) array of tiles for the rows of inputs"
+        return self.tiler.tilesbatch(self.numoutputs, self.memctable,
+                                     self.scale(inputs), self.hashingset)
 
 
 def makeTileCoder(inputdescriptor, numoutputs=1, numtilings=8, \
-                  memorysize=1000, hashingset=None):
+                  memorysize=1000, hashingset=None, tiler=None, ctable=None):
     representer = TileCoderRepresenter(inputdescriptor, numtilings, memorysize,
-                                       hashingset)
+                                       hashingset, tiler, ctable)
     if numoutputs == 1:
         finalfa = NormalizedStepAdaline(memorysize)
     else:
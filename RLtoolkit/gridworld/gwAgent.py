@@ -29,8 +29,9 @@ changeDiff = 0.01  # difference in Q values needed to notice change
 
 class GridAgent(Agent):
     def __init__(self, numactions, numstates, epsilon=0.05, alpha=0.5, \
-                 gamma=.9, initialvalue=0.1, agentlambda=0.8):
+                 gamma=.9, initialvalue=0.1, agentlambda=0.8, rng=None):
         Agent.__init__(self)
+        self.rng = rng  # random number stream; None for the global generator
         self.alpha = alpha
         self.initialvalue = initialvalue
         self.gamma = gamma
@@ -66,7 +67,8 @@ class GridAgent(Agent):
             return max(self.actionvalues(s))
 
     def policy(self, state):
-        return egreedy(self.epsilon, self.numactions, self.actionvalues(state))
+        return egreedy(self.epsilon, self.numactions, self.actionvalues(state),
+                       self.rng)
 
     def agentChoose(self, sprime):  # epsilon greedy
         self.recentsensations = [sprime] + self.recentsensations
@@ -326,9 +328,9 @@ def qLearn(agent, s, a, sprime, r):
 class DynaGridAgent(DeterministicForwardModel, GridAgent):
     def __init__(self, numactions, numstates, epsilon=0.05, alpha=0.5, \
                  gamma=.9, initialvalue=0.1, agentlambda=0.8,
-                 expbonus=0.0):  # .0001
+                 expbonus=0.0, rng=None):  # .0001
         GridAgent.__init__(self, numactions, numstates, epsilon, alpha, \
-                           gamma, initialvalue, agentlambda)
+                           gamma, initialvalue, agentlambda, rng)
         self.agenttime = 0
         self.nummodelsteps = 20
         self.explorationbonus = expbonus
@@ -362,10 +364,11 @@ class DynaGridAgent(DeterministicForwardModel, GridAgent):
         global changeDiff
         qLearn(self, s, a, sprime, reward)
         self.learnworldmodel(s, a, sprime, reward)
+        rng = randomGenerator(self.rng)
         for i in range(self.nummodelsteps):
             for j in range(10 * self.nummodelsteps):
-                s = randrange(self.numstates)
-                a = randrange(self.numactions)
+                s = rng.randrange(self.numstates)
+                a = rng.randrange(self.numactions)
                 sp = self.getpredictednextstate(s, a)
                 r = self.getpredictedreward(s, a)
                 if r == None:
@@ -383,17 +386,19 @@ class DynaGridAgent(DeterministicForwardModel, GridAgent):
 
 class ReducedDynaGridAgent(DynaGridAgent):
     def __init__(self, numactions, numstates, epsilon=0.05, alpha=0.5, \
-                 gamma=.9, initialvalue=0.1, agentlambda=0.0, expbonus=0.0):
+                 gamma=.9, initialvalue=0.1, agentlambda=0.0, expbonus=0.0,
+                 rng=None):
         DynaGridAgent.__init__(self, numactions, numstates, epsilon, alpha, \
-                               gamma, initialvalue, agentlambda, expbonus)
+                               gamma, initialvalue, agentlambda, expbonus, rng)
         self.nummodelsteps = 0
 
 
 class PreloadedDynaGridAgent(DynaGridAgent):
     def __init__(self, numactions, numstates, epsilon=0.05, alpha=0.5, \
-                 gamma=.9, initialvalue=0.1, agentlambda=0.0, expbonus=0.0):
+                 gamma=.9, initialvalue=0.1, agentlambda=0.0, expbonus=0.0,
+                 rng=None):
         DynaGridAgent.__init__(self, numactions, numstates, epsilon, alpha, \
-                               gamma, initialvalue, agentlambda, expbonus)
+                               gamma, initialvalue, agentlambda, expbonus, rng)
         self.nummodelsteps = 1000
 
     def agentInit(self):
@@ -20,8 +20,10 @@ import operator
 
 
 class Gridworld(Environment):
-    def __init__(self, width=8, height=6, startsquare=0, goalsquare=1):
+    def __init__(self, width=8, height=6, startsquare=0, goalsquare=1,
+                 rng=None):
         Environment.__init__(self)
+        self.rng = rng  # random number stream; None for the global generator
         if width == None:
             width = 8
         if height == None:
@@ -130,8 +132,9 @@ class Gridworld(Environment):
 
 
 class ObjectGridworld(Gridworld):
-    def __init__(self, width=8, height=6, startsquare=0, goalsquare=1):
-        Gridworld.__init__(self, width, height, startsquare, goalsquare)
+    def __init__(self, width=8, height=6, startsquare=0, goalsquare=1,
+                 rng=None):
+        Gridworld.__init__(self, width, height, startsquare, goalsquare, rng)
         self.objects = [None for i in range(self.numsquares)]
 
     def envstartepisode(self):
@@ -163,9 +166,10 @@ class ObjectGridworld(Gridworld):
 
 class GPGridworld(Gridworld):
     def envstartepisode(self):
-        randomstart = randrange(self.numsquares)
+        rng = randomGenerator(self.rng)
+        randomstart = rng.randrange(self.numsquares)
         while self.barrierp[randomstart]:
-            randomstart = randrange(self.numsquares)
+            randomstart = rng.randrange(self.numsquares)
         self.state = randomstart
         return randomstart
 
@@ -173,9 +177,9 @@ class GPGridworld(Gridworld):
         proposednextstate = self.neighboringSquare(self.state, action)
         if not proposednextstate == self.goalsquare:
             # be nasty and give a random action half the time
-            if random() > 0.5:
-                action = randomIntegerOtherThan(4, action)
-                proposednextstate = self.neighboringSquare(state, action)
+            if randomGenerator(self.rng).random() > 0.5:
+                action = randomIntegerOtherThan(4, action, self.rng)
+                proposednextstate = self.neighboringSquare(self.state, action)
         if not (
             self.barrierp[proposednextstate] or self.wallp[self.state][action]):
             self.state = proposednextstate
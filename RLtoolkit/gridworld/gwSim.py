@@ -1,6 +1,7 @@
 """ Simulation code for running gridworld
 """
 
+from functools import partial
 from RLtoolkit.RLinterface import RLinterface
 from .gwAgent import *
 from .gwEnv import *
@@ -14,8 +15,8 @@ def simInit(sim, agent, env, verbose=False):
     sim.episodenum = 0
     sim.episodestepnum = 0
     sim.stepnum = 0
-    sim.rlsim = RLinterface(lambda s, r=None: agent.agentfn(verbose, s, r), \
-                            lambda a=None: env.envfn(verbose, a))
+    sim.rlsim = RLinterface(partial(agent.agentfn, verbose),
+                            partial(env.envfn, verbose))
     sim.agent = agent
     sim.env = env
     env.sim = sim
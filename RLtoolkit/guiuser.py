@@ -4,7 +4,7 @@
 # Basic stuff
 from .utilities import *
 from .RLinterface import RLinterface
-from .traces import SimpleTraceHolder, TraceHolder
+from .traces import SimpleTraceHolder, TraceHolder, ArrayTraceHolder
 from .Tiles.tiles import CollisionTable, tiles, loadtiles, tileswrap, \
     loadtileswrap
 from .Tiles.tilesdemo import showtiles
@@ -0,0 +1,194 @@
+# Profiling module
+
+"""
+Measures where the time of a run goes: into the agent or into the environment.
+
+     prof = StepProfiler([sampleEvery])
+     prof.attach(rli)
+          rli can be an RLinterface from RLinterface, RLinterface2 or RLinterface3.
+          Attaching replaces the interface's agent and environment functions (or
+          objects) with timed wrappers; prof.detach(rli) puts the originals back.
+     ... run the interface as usual ...
+     prof.snapshot() -> dict of
+          'steps', 'episodes'      environment steps (not counting episode starts)
+                                   and episodes completed
+          'agentCalls', 'envCalls' calls of the agent and environment
+          'agentTime', 'envTime'   estimated seconds spent in each
+          'agentFraction'          agentTime / (agentTime + envTime)
+          'agentTimePerCall', 'envTimePerCall'
+          'episodeLengths'         dict of episode length -> number of episodes
+          'sampleEvery'
+     prof.reset() - zeroes everything
+
+Only every sampleEvery'th call of each function is timed (every call by
+default), and the times are scaled up accordingly, so that the cost of the timing
+itself can be made small.  Setting prof.enabled = False turns the profiler off
+while it stays attached; each call then costs just one extra test.  An interface
+with no profiler attached runs exactly as before.  Episodes that are cut off (by
+a maximum number of steps) are counted in episodeLengths when the next one starts.
+An interface with a profiler attached can still be copied and pickled (as by
+RLinterface3's RL_benchmark, or snapshot.saveSnapshot); copies time themselves
+into a copy of the profiler.
+"""
+
+import time
+from collections import Counter
+
+
+class StepProfiler:
+    "Accumulates the time spent in the agent and in the environment"
+
+    def __init__(self, sampleEvery=1):
+        self.sampleEvery = sampleEvery
+        self.enabled = True
+        self.reset()
+
+    def reset(self):
+        self.agentCalls = self.envCalls = 0
+        self.agentSampled = self.envSampled = 0  # number of calls timed
+        self.agentTime = self.envTime = 0.0  # total time of the timed calls
+        self.steps = self.episodes = 0
+        self.episodeSteps = 0  # steps so far in the current episode
+        self.episodeLengths = Counter()
+
+    def timeAgent(self, fn, args):
+        "Calls the agent function fn with args, timing it if it is time to"
+        self.agentCalls += 1
+        if self.agentCalls % self.sampleEvery != 0:
+            return fn(*args)
+        start = time.perf_counter()
+        result = fn(*args)
+        self.agentTime += time.perf_counter() - start
+        self.agentSampled += 1
+        return result
+
+    def timeEnv(self, fn, args):
+        "Calls the environment function fn with args, timing it if it is time to"
+        self.envCalls += 1
+        if self.envCalls % self.sampleEvery != 0:
+            return fn(*args)
+        start = time.perf_counter()
+        result = fn(*args)
+        self.envTime += time.perf_counter() - start
+        self.envSampled += 1
+        return result
+
+    def episodeStart(self):
+        if self.episodeSteps > 0:  # the last episode was cut off
+            self.episodeLengths[self.episodeSteps] += 1
+        self.episodeSteps = 0
+
+    def envStep(self, sensation):
+        self.steps += 1
+        self.episodeSteps += 1
+        if isinstance(sensation, str) and sensation == 'terminal':
+            self.episodes += 1
+            self.episodeLengths[self.episodeSteps] += 1
+            self.episodeSteps = 0
+
+    def wrapAgent(self, fn):
+        "A timed version of an agent function"
+        return TimedAgent(self, fn)
+
+    def wrapEnv(self, fn, sensationIndex, start=False):
+        """A timed version of an environment function, whose result's element
+        sensationIndex is the sensation (it is the sensation itself if start)"""
+        return TimedEnvironment(self, fn, sensationIndex, start)
+
+    def attach(self, rli):
+        "Wraps the agent and environment of the interface rli"
+        if hasattr(rli, 'agentFunction'):  # RLinterface
+            rli.agentFunction = self.wrapAgent(rli.agentFunction)
+            rli.environmentFunction = self.wrapEnv(rli.environmentFunction, 0)
+        elif hasattr(rli, 'agentStartFunction'):  # RLinterface2
+            rli.agentStartFunction = self.wrapAgent(rli.agentStartFunction)
+            rli.agentStepFunction = self.wrapAgent(rli.agentStepFunction)
+            rli.environmentStartFunction = \
+                self.wrapEnv(rli.environmentStartFunction, 0, True)
+            rli.environmentStepFunction = \
+                self.wrapEnv(rli.environmentStepFunction, 0)
+        else:  # RLinterface3
+            rli.agent = ProfiledObject(rli.agent, {
+                'agent_start': self.wrapAgent(rli.agent.agent_start),
+                'agent_step': self.wrapAgent(rli.agent.agent_step),
+                'agent_end': self.wrapAgent(rli.agent.agent_end)})
+            rli.environment = ProfiledObject(rli.environment, {
+                'env_start': self.wrapEnv(rli.environment.env_start, 0, True),
+                'env_step': self.wrapEnv(rli.environment.env_step, 1)})
+
+    def detach(self, rli):
+        "Puts back the agent and environment that attach wrapped"
+        if hasattr(rli, 'agentFunction'):
+            rli.agentFunction = rli.agentFunction.unwrapped
+            rli.environmentFunction = rli.environmentFunction.unwrapped
+        elif hasattr(rli, 'agentStartFunction'):
+            for name in ['agentStartFunction', 'agentStepFunction',
+                         'environmentStartFunction', 'environmentStepFunction']:
+                setattr(rli, name, getattr(rli, name).unwrapped)
+        else:
+            rli.agent = rli.agent.original
+            rli.environment = rli.environment.original
+
+    def snapshot(self):
+        "The measurements so far, as a dict"
+        agentTime = self.agentTime * self.agentCalls / max(self.agentSampled, 1)
+        envTime = self.envTime * self.envCalls / max(self.envSampled, 1)
+        total = agentTime + envTime
+        return {'steps': self.steps, 'episodes': self.episodes,
+                'agentCalls': self.agentCalls, 'envCalls': self.envCalls,
+                'agentTime': agentTime, 'envTime': envTime,
+                'agentFraction': agentTime / total if total > 0 else 0.0,
+                'agentTimePerCall': agentTime / max(self.agentCalls, 1),
+                'envTimePerCall': envTime / max(self.envCalls, 1),
+                'episodeLengths': dict(sorted(self.episodeLengths.items())),
+                'sampleEvery': self.sampleEvery}
+
+
+class TimedAgent:
+    "An agent function timed by a StepProfiler (a class, so it can be pickled)"
+
+    def __init__(self, profiler, fn):
+        self.profiler = profiler
+        self.unwrapped = fn
+
+    def __call__(self, *args):
+        if not self.profiler.enabled:
+            return self.unwrapped(*args)
+        return self.profiler.timeAgent(self.unwrapped, args)
+
+
+class TimedEnvironment:
+    "An environment function timed by a StepProfiler"
+
+    def __init__(self, profiler, fn, sensationIndex, start=False):
+        self.profiler = profiler
+        self.unwrapped = fn
+        self.sensationIndex = sensationIndex
+        self.start = start
+
+    def __call__(self, *args):
+        profiler = self.profiler
+        if not profiler.enabled:
+            return self.unwrapped(*args)
+        isStart = self.start or len(args) == 0 or args[0] is None
+        if isStart:
+            profiler.episodeStart()
+        result = profiler.timeEnv(self.unwrapped, args)
+        if not isStart:
+            profiler.envStep(result[self.sensationIndex])
+        return result
+
+
+class ProfiledObject:
+    "Stands in for an agent or environment object, with some methods replaced"
+
+    def __init__(self, original, methods):
+        self.original = original
+        self.__dict__.update(methods)
+
+    def __getattr__(self, name):
+        # only called for names not found normally; while copying or unpickling,
+        # before __dict__ is filled in, original is one of them
+        if name == 'original' or (name.startswith('__') and name.endswith('__')):
+            raise AttributeError(name)
+        return getattr(self.original, name)
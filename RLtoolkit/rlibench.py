@@ -0,0 +1,66 @@
+"""
+Micro-benchmark of the overhead of RLinterface: runs a trivial agent and
+environment (like those of rlitest2a) through each way of running steps, and
+reports the steps per second of each.  Run it with
+
+    python -m RLtoolkit.rlibench [numSteps]
+
+or call benchmark(numSteps), which returns a list of (name, steps per second).
+"""
+
+import sys
+import time
+from .RLinterface import RLinterface
+
+episodeLength = 10  # the trivial environment's episodes are this many steps
+
+
+def makeTrivial():
+    "Returns a trivial agent function and environment function, for RLinterface"
+    state = [0]
+
+    def agent(s, r=None):
+        if s == 'terminal':
+            return None
+        return 1
+
+    def env(a=None):
+        if a == None:  # start of an episode
+            state[0] = 0
+            return 0
+        state[0] += 1
+        if state[0] == episodeLength:
+            return 'terminal', 1
+        return state[0], 0
+
+    return agent, env
+
+
+def timeIt(fn, numSteps):
+    start = time.perf_counter()
+    fn()
+    return numSteps / (time.perf_counter() - start)
+
+
+def benchmark(numSteps=1000000):
+    "Steps per second for each of the ways of running steps"
+    numEpisodes = numSteps // (episodeLength + 1)  # episodes include the start step
+    results = []
+    for name, runner in [
+        ('steps', lambda rli: rli.steps(numSteps)),
+        ('stepsQ', lambda rli: rli.stepsQ(numSteps)),
+        ('episodesQ', lambda rli: rli.episodesQ(numEpisodes, maxStepsTotal=numSteps)),
+        ('iter_steps', lambda rli: [t for t in rli.iter_steps(numSteps)]),
+        ('run', lambda rli: rli.run(numSteps)),
+        ('run (with callbacks)',
+         lambda rli: rli.run(numSteps, onStep=lambda r: None,
+                             onEpisode=lambda steps, ret: None))]:
+        rli = RLinterface(*makeTrivial())
+        results.append((name, timeIt(lambda: runner(rli), numSteps)))
+    return results
+
+
+if __name__ == '__main__':
+    numSteps = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    for name, rate in benchmark(numSteps):
+        print("%-22s %12.0f steps/sec" % (name, rate))
@@ -0,0 +1,109 @@
+# Snapshot module
+
+"""
+Saves the complete state of a run, so that it can be resumed later and continue
+exactly (bit for bit) as it would have without stopping.
+
+     saveSnapshot(filename, state, modules)
+          state is any picklable object, typically a dict holding the agent, the
+          environment and the RLinterface (its counters and next action)
+          modules is a list of modules whose global variables also hold state,
+          such as examples.mountainAgent (theta, traceH, cTable, ...)
+     state = loadSnapshot(filename)
+          restores the modules' global variables and returns state
+
+The states of the random and numpy.random generators are always saved and
+restored as well.  Of a module's globals, everything but modules, functions and
+classes is saved; imported functions and classes are left alone.
+
+The file is written with pickle protocol 5, with the data of every NumPy array
+taken out of the pickle ("out of band") and written as is after it, each starting
+on a 64 byte boundary:
+
+   8 bytes    the magic string RLTKSNP1
+   8 bytes    the length of the pickle, little endian
+   8 bytes    the number of arrays, n
+   8n bytes   the number of bytes in each array
+   pickle     everything else
+   arrays     the raw array data
+
+Loading reads the file into memory once and gives the arrays that memory, so
+multi-gigabyte weight arrays are neither pickled nor copied.  Snapshots are
+pickles: only load ones you made yourself.
+"""
+
+import importlib
+import os
+import pickle
+import random
+import types
+import numpy as np
+
+_magic = b'RLTKSNP1'
+_alignment = 64
+
+
+def _aligned(position):
+    return (position + _alignment - 1) // _alignment * _alignment
+
+
+def moduleState(module):
+    "The global variables of module that hold state"
+    return {name: value for name, value in vars(module).items()
+            if not name.startswith('__') and
+            not isinstance(value, (types.ModuleType, types.FunctionType,
+                                   types.BuiltinFunctionType, type))}
+
+
+def saveSnapshot(filename, state=None, modules=()):
+    "Writes state, the state of the modules and of the random generators to filename"
+    snapshot = {'version': 1, 'state': state,
+                'modules': {m.__name__: moduleState(m) for m in modules},
+                'random': random.getstate(),
+                'numpyrandom': np.random.get_state()}
+    buffers = []
+    data = pickle.dumps(snapshot, protocol=5, buffer_callback=buffers.append)
+    raws = [b.raw() for b in buffers]
+    with open(filename, 'wb') as f:
+        f.write(_magic)
+        f.write(len(data).to_bytes(8, 'little'))
+        f.write(len(raws).to_bytes(8, 'little'))
+        for raw in raws:
+            f.write(raw.nbytes.to_bytes(8, 'little'))
+        f.write(data)
+        position = len(_magic) + 16 + 8 * len(raws) + len(data)
+        for raw in raws:
+            start = _aligned(position)
+            f.write(b'\0' * (start - position))
+            f.write(raw)
+            position = start + raw.nbytes
+
+
+def loadSnapshot(filename):
+    "Restores the modules and random generators saved in filename; returns its state"
+    with open(filename, 'rb') as f:
+        contents = bytearray(os.fstat(f.fileno()).st_size)
+        f.readinto(contents)
+    view = memoryview(contents)
+    if bytes(view[:len(_magic)]) != _magic:
+        raise ValueError(filename + " is not a snapshot")
+    position = len(_magic)
+    length = int.from_bytes(view[position:position + 8], 'little')
+    numbuffers = int.from_bytes(view[position + 8:position + 16], 'little')
+    position += 16
+    sizes = [int.from_bytes(view[position + 8 * i:position + 8 * i + 8], 'little')
+             for i in range(numbuffers)]
+    position += 8 * numbuffers
+    data = view[position:position + length]
+    position += length
+    buffers = []
+    for size in sizes:
+        start = _aligned(position)
+        buffers.append(pickle.PickleBuffer(view[start:start + size]))
+        position = start + size
+    snapshot = pickle.loads(data, buffers=buffers)
+    for name, values in snapshot['modules'].items():
+        vars(importlib.import_module(name)).update(values)
+    random.setstate(snapshot['random'])
+    np.random.set_state(snapshot['numpyrandom'])
+    return snapshot['state']
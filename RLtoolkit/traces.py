@@ -7,22 +7,39 @@
 #
 #  Classes:    SimpleTraceHolder  (the simpler version)
 #          or     TraceHolder (the more complicated one)
+#          or     ArrayTraceHolder (TraceHolder with its lists in NumPy arrays)
+#          or     ScaledTraceHolder (ArrayTraceHolder with constant time decay)
+#          or     PartitionedTraceHolder (traces kept in one list per action)
+#          or     DutchTraceHolder (dutch traces, for true online TD(lambda))
 #  Initialize your trace object with 
 #                  t = SimpleTraceHolder)[memorySize, ignored, ignored])
 #       or        t = TraceHolder(]memorySize, minimumTrace, maximumNumberofTraces])
+#       or        t = ArrayTraceHolder(memorySize, minimumTrace, maximumNumberofTraces)
+#       or        t = ScaledTraceHolder(memorySize, minimumTrace, maximumNumberofTraces,
+#                                       sweepInterval, minScale)
+#       or        t = PartitionedTraceHolder(memorySize, minimumTrace, maximumNumberofTraces,
+#                                            numberOfPartitions)
+#       or        t = DutchTraceHolder(memorySize, minimumTrace, maximumNumberofTraces)
 # The following methods are available for each class:
 #      t.getTrace(f) - gets the trace value for feature f
 #      t.clearTrace(f) - clears the trace value for feature f
 #      t.decayTraces(rate) - decays traces by rate
 #      t.setTrace(f, newvalue) - sets the trace for feature f to newvalue
 #      t.addToTrace(f, value) - adds value to the trace for feature f
-#      t.getTraceindices() - returns a list of trace indices (shorter for the non zero trace version)
+#      t.getTraceindices() - returns a list of trace indices (shorter for the non zero trace version,
+#                             and an array for ArrayTraceHolder)
 #      t.replaceTraces(flist) - replaces traces for features in flist with 1.0
 #      t.accumulateTraces(flist) - adds 1.0 to trace for each feature in flist
 #        (for the last two, flist may be a list or a single item)
-#  Trace Holder also has one additional method:
-#      t.increaseMinTrace() - increases the minimum trace by 10%
+#      t.applyToWeights(theta, amount) - adds amount * trace to theta[f] for each
+#        feature f with a nonzero trace
+#      t.applyDecayReplace(theta, amount, decay, flist) - the standard Sarsa(lambda)
+#        step: applyToWeights, then decayTraces(decay), then replaceTraces(flist)
+#  Trace Holder also has an additional method:
+#      t.evictTraces(num) - clears the num smallest traces
 
+import heapq
+import numpy as np
 
 #        Naive Traces
 # Below is the code for working with naive traces where no checking against
@@ -76,8 +93,7 @@ class SimpleTraceHolder:
         for nlist in olist:  # replace traces for other actions
             for i in nlist:
                 self.clearTrace(i)
-        for i in flist:
-            self.setTrace(i, 1.0)  # replacing traces for current action
+        self.replaceTraces(list(flist))  # replacing traces for current action
 
     def accumulateTraces(self, flist):
         "Accumulate traces for the features given"
@@ -88,6 +104,17 @@ class SimpleTraceHolder:
         else:
             self.addToTrace(flist, 1.0)
 
+    def applyToWeights(self, theta, amount):
+        "Adds amount times each feature's trace to its weight in theta"
+        for f, e in self.E.items():
+            theta[f] += amount * e
+
+    def applyDecayReplace(self, theta, amount, decayRate, flist):
+        "Updates theta with the traces, then decays them and replaces those for flist"
+        self.applyToWeights(theta, amount)
+        self.decayTraces(decayRate)
+        self.replaceTraces(flist)
+
 
 # Efficient Traces
 # Below is the code for selectively working only with traces >= minTrace. 
@@ -102,6 +129,9 @@ class SimpleTraceHolder:
 # having to search through the list we keep inverse pointers from each trace
 # back to its position (if nonzero) in the nonZeroTraces list.  These inverse 
 # pointers are in the array "nonZeroTracesInverse".
+# When the list is full and a new trace is needed, the smallest traces are
+# evicted to make room (found with a heap, or a partial sort for the array
+# version), so minTrace stays as it was set.
 
 
 class TraceHolder(SimpleTraceHolder):
@@ -149,39 +179,634 @@ class TraceHolder(SimpleTraceHolder):
         "Set the trace for feature f to the given value, which must be positive"
         if self.E[f] >= self.minTrace:
             self.E[f] = newValue
-        elif self.numNonZeroTraces < self.maxNonZeroTraces:
-            self.E[f] = newValue
-            self.nonZeroTraces[self.numNonZeroTraces] = f
-            self.nonZeroTracesInverse[f] = self.numNonZeroTraces
-            self.numNonZeroTraces += 1
         else:
-            self.increaseMinTrace()
-            self.setTrace(f, newValue)
+            self.newTrace(f, newValue)
 
     def addToTrace(self, f, newValue):
         "Add the new value to the trace for feature f"
         if self.E[f] >= self.minTrace:
             self.E[f] += newValue
-        elif self.numNonZeroTraces < self.maxNonZeroTraces:
-            self.E[f] += newValue
-            self.nonZeroTraces[self.numNonZeroTraces] = f
-            self.nonZeroTracesInverse[f] = self.numNonZeroTraces
-            self.numNonZeroTraces += 1
         else:
-            self.IncreaseMinTrace()
-            self.AddToTrace(f, newValue)
-
-    def increaseMinTrace(self):
-        """Try to make room for more traces by incrementing minTrace by 10%, culling
-            any traces bewlow the new minimum"""
-        self.minTrace += self.minTrace * 0.1
-        print(("Changing minTrace to", self.minTrace))
-        for loc in range(self.numNonZeroTraces - 1, -1,
-                         -1):  # go through trace list backwards
-            f = self.nonZeroTraces[loc]
-            if self.E[f] < self.minTrace:  # check with new minTrace
-                self.clearExistantTrace(f, loc)
+            self.newTrace(f, self.E[f] + newValue)
+
+    def newTrace(self, f, newValue):
+        "Adds f to the list of nonzero traces, evicting the smallest trace if it is full"
+        if self.numNonZeroTraces >= self.maxNonZeroTraces:
+            self.evictTraces(1)
+        self.E[f] = newValue
+        self.nonZeroTraces[self.numNonZeroTraces] = f
+        self.nonZeroTracesInverse[f] = self.numNonZeroTraces
+        self.numNonZeroTraces += 1
+
+    def evictTraces(self, num):
+        "Clears the num smallest traces, to make room for new ones"
+        E = self.E
+        smallest = heapq.nsmallest(num, self.nonZeroTraces[:self.numNonZeroTraces],
+                                   key=E.__getitem__)
+        for f in smallest:
+            self.clearExistentTrace(f, self.nonZeroTracesInverse[f])
+
+    def changeTraces(self, flist, newValue):
+        """Sets (or adds to) the traces of the features in flist with newValue,
+        doing the existing traces first and then evicting, in one pass, as many
+        as are needed to make room for the rest"""
+        if not isinstance(flist, (tuple, list)):
+            flist = [flist]
+        new = []
+        for f in flist:
+            if self.E[f] >= self.minTrace:
+                newValue(f)
+            else:
+                new.append(f)
+        excess = self.numNonZeroTraces + len(set(new)) - self.maxNonZeroTraces
+        if excess > 0:
+            self.evictTraces(excess)
+        for f in new:
+            newValue(f)
+
+    def replaceTraces(self, flist):
+        "Replaces traces for the features given"
+        self.changeTraces(flist, lambda f: self.setTrace(f, 1.0))
+
+    def accumulateTraces(self, flist):
+        "Accumulate traces for the features given"
+        self.changeTraces(flist, lambda f: self.addToTrace(f, 1.0))
 
     def getTraceIndices(self):
         "Returns a list of only the nonzero trace indices to update Theta with"
         return [self.nonZeroTraces[t] for t in range(self.numNonZeroTraces)]
+
+    def applyToWeights(self, theta, amount):
+        "Adds amount times each nonzero trace to its feature's weight in theta"
+        E = self.E
+        for loc in range(self.numNonZeroTraces):
+            f = self.nonZeroTraces[loc]
+            theta[f] += amount * E[f]
+
+
+# Array Traces
+# Below is the same scheme as TraceHolder, but with the list of nonzero traces
+# kept in NumPy arrays so that whole-list operations are single array operations.
+# The indices of the nonzero traces are in the int array "nonZeroTraces" and their
+# values, in the same order, in the float array "traceValues"; both are used only
+# up to "numNonZeroTraces".  "nonZeroTracesInverse" maps each feature to its
+# position in these arrays, or -1 if its trace is zero.  Decaying is one multiply
+# of the live values, and culling is a boolean mask followed by compacting the
+# survivors to the front of the arrays and refreshing their inverse pointers.
+
+class ArrayTraceHolder(TraceHolder):
+    "Object to hold eligibility traces, with the non zero traces in NumPy arrays"
+
+    def __init__(self, mem=8192, minT=0.01, maxN=1000):
+        "Initializes the trace parameters and arrays"
+        self.n = mem  # memory size
+        self.maxNonZeroTraces = maxN  # maximum length of list
+        self.minTrace = minT  # all traces below this are set to 0
+        self.numNonZeroTraces = 0  # current number of non zero traces
+        self.nonZeroTraces = np.zeros(self.maxNonZeroTraces,
+                                      dtype=np.intp)  # features with non zero traces
+        self.traceValues = np.zeros(
+            self.maxNonZeroTraces)  # their trace values
+        self.nonZeroTracesInverse = np.full(self.n, -1,
+                                            dtype=np.intp)  # back to position in list
+
+    def getTrace(self, f):
+        "Gets the value for traces for feature f"
+        loc = self.nonZeroTracesInverse[f]
+        if loc < 0:
+            return 0.0
+        return self.traceValues[loc]
+
+    def clearTrace(self, f):
+        "Clears any trace for feature f"
+        loc = self.nonZeroTracesInverse[f]
+        if loc >= 0:
+            self.clearExistentTrace(f, loc)
+
+    def clearExistentTrace(self, f, loc):
+        "Clears the trace for feature f at location loc in the list of nonzero traces"
+        self.numNonZeroTraces -= 1
+        last = self.numNonZeroTraces
+        self.nonZeroTracesInverse[f] = -1
+        if loc != last:  # move the last trace into the hole
+            lastf = self.nonZeroTraces[last]
+            self.nonZeroTraces[loc] = lastf
+            self.traceValues[loc] = self.traceValues[last]
+            self.nonZeroTracesInverse[lastf] = loc
+
+    def keepTraces(self, keep):
+        "Compacts the list of nonzero traces to those where the boolean array keep is true"
+        num = self.numNonZeroTraces
+        features = self.nonZeroTraces[:num]
+        self.nonZeroTracesInverse[features[~keep]] = -1
+        kept = features[keep]
+        newnum = len(kept)
+        self.nonZeroTraces[:newnum] = kept
+        self.traceValues[:newnum] = self.traceValues[:num][keep]
+        self.nonZeroTracesInverse[kept] = np.arange(newnum)
+        self.numNonZeroTraces = newnum
+
+    def clearAllTraces(self):
+        "Clears every trace"
+        num = self.numNonZeroTraces
+        self.nonZeroTracesInverse[self.nonZeroTraces[:num]] = -1
+        self.numNonZeroTraces = 0
+
+    def decayTraces(self, decayRate):
+        "Decays all the (nonzero) traces by decay rate, removing those below minTrace"
+        if decayRate == 0:
+            self.clearAllTraces()
+            return
+        values = self.traceValues[:self.numNonZeroTraces]
+        values *= decayRate
+        keep = values >= self.minTrace
+        if not keep.all():
+            self.keepTraces(keep)
+
+    def appendTraces(self, features, values):
+        """Adds new nonzero traces for features (which must all have zero traces
+        now); if there are more than fit at all, only the last maxN are kept"""
+        num = len(features)
+        if num > self.maxNonZeroTraces:
+            values = np.broadcast_to(values, num)[-self.maxNonZeroTraces:]
+            features = features[-self.maxNonZeroTraces:]
+            num = self.maxNonZeroTraces
+        if self.numNonZeroTraces + num > self.maxNonZeroTraces:
+            self.makeRoom(num)
+        start = self.numNonZeroTraces
+        self.nonZeroTraces[start:start + num] = features
+        self.traceValues[start:start + num] = values
+        self.nonZeroTracesInverse[features] = np.arange(start, start + num)
+        self.numNonZeroTraces += num
+
+    def makeRoom(self, num):
+        "Makes room in the list of nonzero traces for num more"
+        excess = self.numNonZeroTraces + num - self.maxNonZeroTraces
+        if excess > 0:
+            self.evictTraces(excess)
+
+    def evictTraces(self, num):
+        "Clears the num smallest traces, to make room for new ones"
+        values = self.traceValues[:self.numNonZeroTraces]
+        keep = np.zeros(len(values), dtype=bool)
+        if num < len(values):
+            keep[:] = True
+            keep[np.argpartition(values, num - 1)[:num]] = False
+        self.keepTraces(keep)
+
+    def setTrace(self, f, newValue):
+        "Set the trace for feature f to the given value, which must be positive"
+        loc = self.nonZeroTracesInverse[f]
+        if loc >= 0:
+            self.traceValues[loc] = newValue
+        else:
+            self.appendTraces([f], newValue)
+
+    def addToTrace(self, f, newValue):
+        "Add the new value to the trace for feature f"
+        loc = self.nonZeroTracesInverse[f]
+        if loc >= 0:
+            self.traceValues[loc] += newValue
+        else:
+            self.appendTraces([f], newValue)
+
+    def getTraceIndices(self):
+        "Returns an array of only the nonzero trace indices to update Theta with"
+        return self.nonZeroTraces[:self.numNonZeroTraces].copy()
+
+    def applyToWeights(self, theta, amount):
+        """Adds amount times each nonzero trace to its feature's weight in theta,
+           in one array operation if theta is an array"""
+        num = self.numNonZeroTraces
+        features = self.nonZeroTraces[:num]
+        if isinstance(theta, np.ndarray):
+            theta[features] += amount * self.traceValues[:num]
+        else:
+            for f, e in zip(features.tolist(), self.traceValues[:num].tolist()):
+                theta[f] += amount * e
+
+    def replaceTraces(self, flist):
+        "Replaces traces for the features given"
+        features = np.unique(np.asarray(flist, dtype=np.intp))
+        locs = self.nonZeroTracesInverse[features]
+        self.traceValues[locs[locs >= 0]] = 1.0
+        self.appendTraces(features[locs < 0], 1.0)
+
+    def replaceTracesZero(self, flist, olist):
+        "Replaces traces for given features with 1, other features's 0"
+        for nlist in olist:  # replace traces for other actions
+            for i in nlist:
+                self.clearTrace(i)
+        self.replaceTraces(flist)  # replacing traces for current action
+
+    def accumulateTraces(self, flist):
+        "Accumulate traces for the features given"
+        features, counts = np.unique(np.asarray(flist, dtype=np.intp),
+                                     return_counts=True)
+        locs = self.nonZeroTracesInverse[features]
+        old = locs >= 0
+        self.traceValues[locs[old]] += counts[old]
+        self.appendTraces(features[~old], counts[~old])
+
+
+# Scaled Traces
+# Decaying every trace by the same rate is a uniform multiply, so instead of doing
+# it to each trace we keep the traces divided by a global "scale", and decay only
+# multiplies the scale: a trace's real value is scale * its stored value.  New
+# traces are stored divided by the current scale.  When the scale gets as small
+# as minScale, the stored values are multiplied through by it and it is reset to
+# 1, so the stored values never overflow.  Traces that have fallen below minTrace
+# are not removed at each decay; they are dropped when they are read, when room is
+# needed for new traces, at a renormalization, and in a sweep every sweepInterval
+# decays.  Until then they are still applied to the weights, but they are
+# smaller than minTrace.  A decay thus costs O(1), whatever the number of traces.
+
+class ScaledTraceHolder(ArrayTraceHolder):
+    "Object to hold eligibility traces, decayed by a single global scale factor"
+
+    def __init__(self, mem=8192, minT=0.01, maxN=1000, sweepInterval=100,
+                 minScale=1e-100):
+        "Initializes the trace parameters and arrays"
+        ArrayTraceHolder.__init__(self, mem, minT, maxN)
+        self.scale = 1.0  # real trace values are scale * traceValues
+        self.minScale = minScale  # renormalize when the scale gets this small
+        self.sweepInterval = sweepInterval  # decays between sweeps
+        self.decaysSinceSweep = 0
+
+    def getTrace(self, f):
+        "Gets the value for traces for feature f"
+        loc = self.nonZeroTracesInverse[f]
+        if loc < 0:
+            return 0.0
+        value = self.scale * self.traceValues[loc]
+        if value < self.minTrace:  # lazily drop decayed traces
+            self.clearExistentTrace(f, loc)
+            return 0.0
+        return value
+
+    def clearAllTraces(self):
+        "Clears every trace"
+        ArrayTraceHolder.clearAllTraces(self)
+        self.scale = 1.0
+
+    def decayTraces(self, decayRate):
+        "Decays all the (nonzero) traces by decay rate, in constant time"
+        if decayRate == 0:
+            self.clearAllTraces()
+            return
+        self.scale *= decayRate
+        self.decaysSinceSweep += 1
+        if self.scale <= self.minScale:
+            self.renormalize()
+        elif self.decaysSinceSweep >= self.sweepInterval:
+            self.sweepTraces()
+
+    def renormalize(self):
+        "Folds the scale into the stored trace values and resets it to 1"
+        self.traceValues[:self.numNonZeroTraces] *= self.scale
+        self.scale = 1.0
+        self.sweepTraces()
+
+    def sweepTraces(self):
+        "Removes all the traces that have decayed below minTrace"
+        self.decaysSinceSweep = 0
+        keep = self.scale * self.traceValues[:self.numNonZeroTraces] >= \
+               self.minTrace
+        if not keep.all():
+            self.keepTraces(keep)
+
+    def makeRoom(self, num):
+        "Makes room in the list of nonzero traces for num more"
+        self.sweepTraces()
+        ArrayTraceHolder.makeRoom(self, num)
+
+    def setTrace(self, f, newValue):
+        "Set the trace for feature f to the given value, which must be positive"
+        ArrayTraceHolder.setTrace(self, f, newValue / self.scale)
+
+    def addToTrace(self, f, newValue):
+        "Add the new value to the trace for feature f"
+        self.getTrace(f)  # drops the trace if it has decayed below minTrace
+        ArrayTraceHolder.addToTrace(self, f, newValue / self.scale)
+
+    def getTraceIndices(self):
+        "Returns an array of only the nonzero trace indices to update Theta with"
+        self.sweepTraces()
+        return ArrayTraceHolder.getTraceIndices(self)
+
+    def applyToWeights(self, theta, amount):
+        """Adds amount times each nonzero trace to its feature's weight in theta,
+           in one array operation if theta is an array"""
+        ArrayTraceHolder.applyToWeights(self, theta, amount * self.scale)
+
+    def replaceTraces(self, flist):
+        "Replaces traces for the features given"
+        features = np.unique(np.asarray(flist, dtype=np.intp))
+        locs = self.nonZeroTracesInverse[features]
+        self.traceValues[locs[locs >= 0]] = 1.0 / self.scale
+        self.appendTraces(features[locs < 0], 1.0 / self.scale)
+
+    def accumulateTraces(self, flist):
+        "Accumulate traces for the features given"
+        features, counts = np.unique(np.asarray(flist, dtype=np.intp),
+                                     return_counts=True)
+        counts = counts / self.scale
+        locs = self.nonZeroTracesInverse[features]
+        old = locs >= 0
+        values = self.traceValues[locs[old]]
+        values[self.scale * values < self.minTrace] = 0.0  # decayed traces restart
+        self.traceValues[locs[old]] = values + counts[old]
+        self.appendTraces(features[~old], counts[~old])
+
+
+# Partitioned Traces
+# Here each nonzero trace belongs to a partition, given by an int tag, typically
+# the action whose features it is for.  Each partition has its own list of
+# nonzero traces, in row "tag" of the arrays "partitionFeatures" and
+# "partitionValues", used up to "partitionCounts[tag]", so maxN is the maximum
+# number of traces in each partition.  For each feature, "featurePartition" and
+# "featureLoc" point back to where its trace is; such a pointer is only believed
+# if it lies within the used part of that partition's list and the feature there
+# really is this one.  Clearing a whole partition therefore needs only setting its
+# count to zero; the stale pointers into it fail the check.  This makes clearing
+# the traces of all the other actions, as replaceTracesZero does, one small loop
+# over the partitions instead of a loop over all their features.
+# The methods that create traces take the tag as an extra, optional argument
+# (default 0).  Setting a trace under a new tag moves it to that partition.
+
+class PartitionedTraceHolder(SimpleTraceHolder):
+    "Object to hold eligibility traces, kept in one list per action (or other tag)"
+
+    def __init__(self, mem=8192, minT=0.01, maxN=1000, numPartitions=1):
+        "Initializes the trace parameters and arrays"
+        self.n = mem  # memory size
+        self.maxNonZeroTraces = maxN  # maximum length of each partition's list
+        self.minTrace = minT  # all traces below this are set to 0
+        self.numPartitions = numPartitions
+        self.partitionFeatures = np.zeros((numPartitions, maxN), dtype=np.intp)
+        self.partitionValues = np.zeros((numPartitions, maxN))
+        self.partitionCounts = np.zeros(numPartitions, dtype=np.intp)
+        self.featurePartition = np.zeros(self.n, dtype=np.intp)
+        self.featureLoc = np.full(self.n, maxN, dtype=np.intp)  # maxN is never valid
+
+    def locateTraces(self, features):
+        """Returns the partition and position of each feature's trace, for an array
+           of features; the partition is -1 for those with no trace"""
+        tags = self.featurePartition[features]
+        locs = self.featureLoc[features]
+        valid = locs < self.partitionCounts[tags]
+        valid[valid] = self.partitionFeatures[tags[valid], locs[valid]] == \
+                       features[valid]
+        tags[~valid] = -1
+        return tags, locs
+
+    def locateTrace(self, f):
+        "Returns the partition and position of f's trace, or (-1, -1) if it has none"
+        tag = self.featurePartition[f]
+        loc = self.featureLoc[f]
+        if loc < self.partitionCounts[tag] and \
+                self.partitionFeatures[tag, loc] == f:
+            return tag, loc
+        return -1, -1
+
+    def getTrace(self, f):
+        "Gets the value for traces for feature f"
+        tag, loc = self.locateTrace(f)
+        if tag < 0:
+            return 0.0
+        return self.partitionValues[tag, loc]
+
+    def getTraceTag(self, f):
+        "Gets the partition of feature f's trace, or -1 if it has none"
+        return self.locateTrace(f)[0]
+
+    def clearTrace(self, f):
+        "Clears any trace for feature f"
+        tag, loc = self.locateTrace(f)
+        if tag >= 0:
+            self.clearExistentTrace(tag, loc)
+
+    def clearExistentTrace(self, tag, loc):
+        "Clears the trace at location loc in partition tag's list"
+        self.partitionCounts[tag] -= 1
+        last = self.partitionCounts[tag]
+        if loc != last:  # move the last trace into the hole
+            lastf = self.partitionFeatures[tag, last]
+            self.partitionFeatures[tag, loc] = lastf
+            self.partitionValues[tag, loc] = self.partitionValues[tag, last]
+            self.featureLoc[lastf] = loc
+
+    def clearPartition(self, tag):
+        "Clears all the traces in partition tag"
+        self.partitionCounts[tag] = 0
+
+    def clearOtherPartitions(self, tag):
+        "Clears all the traces that are not in partition tag"
+        count = self.partitionCounts[tag]
+        self.partitionCounts[:] = 0
+        self.partitionCounts[tag] = count
+
+    def clearAllTraces(self):
+        "Clears every trace"
+        self.partitionCounts[:] = 0
+
+    def keepTraces(self, tag, keep):
+        "Compacts partition tag's list to the traces where the boolean array keep is true"
+        count = self.partitionCounts[tag]
+        kept = self.partitionFeatures[tag, :count][keep]
+        newcount = len(kept)
+        self.partitionValues[tag, :newcount] = \
+            self.partitionValues[tag, :count][keep]
+        self.partitionFeatures[tag, :newcount] = kept
+        self.featureLoc[kept] = np.arange(newcount)
+        self.partitionCounts[tag] = newcount
+
+    def decayTraces(self, decayRate):
+        "Decays all the (nonzero) traces by decay rate, removing those below minTrace"
+        if decayRate == 0:
+            self.clearAllTraces()
+            return
+        for tag in np.flatnonzero(self.partitionCounts):
+            values = self.partitionValues[tag, :self.partitionCounts[tag]]
+            values *= decayRate
+            keep = values >= self.minTrace
+            if not keep.all():
+                self.keepTraces(tag, keep)
+
+    def appendTraces(self, features, values, tag=0):
+        """Adds new traces for features (which must all have no trace now) to
+        partition tag; if there are more than fit at all, only the last maxN are kept"""
+        num = len(features)
+        if num > self.maxNonZeroTraces:
+            values = np.broadcast_to(values, num)[-self.maxNonZeroTraces:]
+            features = features[-self.maxNonZeroTraces:]
+            num = self.maxNonZeroTraces
+        excess = self.partitionCounts[tag] + num - self.maxNonZeroTraces
+        if excess > 0:
+            self.evictTraces(tag, excess)
+        start = self.partitionCounts[tag]
+        self.partitionFeatures[tag, start:start + num] = features
+        self.partitionValues[tag, start:start + num] = values
+        self.featurePartition[features] = tag
+        self.featureLoc[features] = np.arange(start, start + num)
+        self.partitionCounts[tag] += num
+
+    def evictTraces(self, tag, num):
+        "Clears the num smallest traces in partition tag, to make room for new ones"
+        values = self.partitionValues[tag, :self.partitionCounts[tag]]
+        keep = np.zeros(len(values), dtype=bool)
+        if num < len(values):
+            keep[:] = True
+            keep[np.argpartition(values, num - 1)[:num]] = False
+        self.keepTraces(tag, keep)
+
+    def setTrace(self, f, newValue, tag=0):
+        "Set the trace for feature f, in partition tag, to the given value"
+        oldtag, loc = self.locateTrace(f)
+        if oldtag == tag:
+            self.partitionValues[tag, loc] = newValue
+            return
+        if oldtag >= 0:
+            self.clearExistentTrace(oldtag, loc)
+        self.appendTraces([f], newValue, tag)
+
+    def addToTrace(self, f, newValue, tag=0):
+        "Add the new value to the trace for feature f, moving it to partition tag"
+        oldtag, loc = self.locateTrace(f)
+        if oldtag == tag:
+            self.partitionValues[tag, loc] += newValue
+            return
+        if oldtag >= 0:
+            newValue += self.partitionValues[oldtag, loc]
+            self.clearExistentTrace(oldtag, loc)
+        self.appendTraces([f], newValue, tag)
+
+    def getTraceIndices(self):
+        "Returns an array of only the nonzero trace indices to update Theta with"
+        return np.concatenate([self.partitionFeatures[tag, :count] for tag, count
+                               in enumerate(self.partitionCounts)])
+
+    def applyToWeights(self, theta, amount):
+        "Adds amount times each nonzero trace to its feature's weight in theta"
+        for tag in np.flatnonzero(self.partitionCounts):
+            count = self.partitionCounts[tag]
+            features = self.partitionFeatures[tag, :count]
+            values = self.partitionValues[tag, :count]
+            if isinstance(theta, np.ndarray):
+                theta[features] += amount * values
+            else:
+                for f, e in zip(features.tolist(), values.tolist()):
+                    theta[f] += amount * e
+
+    def applyDecayReplace(self, theta, amount, decayRate, flist, tag=0):
+        "Updates theta with the traces, then decays them and replaces those for flist"
+        self.applyToWeights(theta, amount)
+        self.decayTraces(decayRate)
+        self.replaceTraces(flist, tag)
+
+    def moveTraces(self, features, tag):
+        """Moves the traces of features into partition tag.  Returns the positions
+           of their traces there, -1 for those with no trace"""
+        tags, locs = self.locateTraces(features)
+        for i in np.flatnonzero((tags >= 0) & (tags != tag)):
+            value = self.partitionValues[tags[i], locs[i]]
+            self.clearExistentTrace(tags[i], locs[i])
+            self.appendTraces(features[i:i + 1], value, tag)
+        if len(features) > 0:
+            tags, locs = self.locateTraces(features)
+        locs[tags < 0] = -1
+        return locs
+
+    def replaceTraces(self, flist, tag=0):
+        "Replaces traces for the features given, putting them in partition tag"
+        features = np.unique(np.asarray(flist, dtype=np.intp))
+        locs = self.moveTraces(features, tag)
+        self.partitionValues[tag, locs[locs >= 0]] = 1.0
+        self.appendTraces(features[locs < 0], 1.0, tag)
+
+    def replaceTracesZero(self, flist, olist, tag=None):
+        """Replaces traces for given features with 1, other features's 0.  If tag is
+           not None, the other features are taken to be all those in other partitions,
+           which are cleared in bulk, and olist is not used"""
+        if tag == None:
+            SimpleTraceHolder.replaceTracesZero(self, flist, olist)
+        else:
+            self.clearOtherPartitions(tag)
+            self.replaceTraces(flist, tag)
+
+    def accumulateTraces(self, flist, tag=0):
+        "Accumulate traces for the features given, putting them in partition tag"
+        features, counts = np.unique(np.asarray(flist, dtype=np.intp),
+                                     return_counts=True)
+        locs = self.moveTraces(features, tag)
+        old = locs >= 0
+        self.partitionValues[tag, locs[old]] += counts[old]
+        self.appendTraces(features[~old], counts[~old], tag)
+
+
+# Dutch Traces
+# True online TD(lambda) (van Seijen & Sutton) uses dutch traces,
+#     e <- gamma*lambda*e + (1 - alpha*gamma*lambda*e.x) x
+# and a weight update with a correction term,
+#     theta <- theta + alpha*(delta + V - Vold) e - alpha*(V - Vold) x
+# where V = theta.x is the value of the current features, computed before this
+# update, and Vold is the value V' = theta.x' of the same features found in the
+# previous step, i.e., with the weights before the previous update.  With binary
+# features x is just the list of active features, so e.x is the sum of their
+# traces and only they and the nonzero traces are touched.  One step is
+#
+#     V = theta[flist].sum()
+#     Vnext = theta[nextflist].sum()   (0 at the end of the episode)
+#     delta = reward + gamma * Vnext - V
+#     t.updateDutchTraces(flist, alpha, gamma * lambda)
+#     t.applyTrueOnline(theta, alpha, delta, V - Vold, flist)
+#     Vold = Vnext
+#
+# with Vold = 0 and t.clearAllTraces() at the start of each episode.  As dutch
+# traces can be negative, traces are culled and evicted by their absolute value.
+
+class DutchTraceHolder(ArrayTraceHolder):
+    "Object to hold dutch eligibility traces, with the non zero traces in NumPy arrays"
+
+    def decayTraces(self, decayRate):
+        "Decays all the (nonzero) traces by decay rate, removing those below minTrace"
+        if decayRate == 0:
+            self.clearAllTraces()
+            return
+        values = self.traceValues[:self.numNonZeroTraces]
+        values *= decayRate
+        keep = np.abs(values) >= self.minTrace
+        if not keep.all():
+            self.keepTraces(keep)
+
+    def evictTraces(self, num):
+        "Clears the num smallest traces, to make room for new ones"
+        values = np.abs(self.traceValues[:self.numNonZeroTraces])
+        keep = np.zeros(len(values), dtype=bool)
+        if num < len(values):
+            keep[:] = True
+            keep[np.argpartition(values, num - 1)[:num]] = False
+        self.keepTraces(keep)
+
+    def updateDutchTraces(self, flist, alpha, decayRate):
+        """Decays the traces by decayRate and adds 1 - alpha * e.x to the trace of
+           each active feature in flist (binary features, so repeats count once)"""
+        features = np.unique(np.asarray(flist, dtype=np.intp))
+        self.decayTraces(decayRate)
+        locs = self.nonZeroTracesInverse[features]
+        old = locs >= 0
+        ex = self.traceValues[locs[old]].sum()  # e.x, after decaying
+        increment = 1.0 - alpha * ex
+        self.traceValues[locs[old]] += increment
+        self.appendTraces(features[~old], increment)
+
+    def applyTrueOnline(self, theta, alpha, delta, vDiff, flist):
+        """Updates theta by alpha*(delta + vDiff) times the traces, minus alpha*vDiff
+           for each active feature in flist; vDiff is V - Vold"""
+        self.applyToWeights(theta, alpha * (delta + vDiff))
+        correction = alpha * vDiff
+        if isinstance(theta, np.ndarray):
+            theta[np.unique(np.asarray(flist, dtype=np.intp))] -= correction
+        else:
+            for f in set(flist):
+                theta[f] -= correction
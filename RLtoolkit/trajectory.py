@@ -0,0 +1,153 @@
+# Trajectory module
+
+"""
+Records experience as columns of NumPy arrays, one row per transition, instead of
+as flat lists of sensations, actions and rewards.
+
+     rec = TrajectoryRecorder(obsShape, obsDtype, actionShape, actionDtype, capacity)
+Methods:
+rec.startEpisode() - marks the start of a new episode at the next row
+rec.add(s, a, r, terminal) - adds a row: in sensation s, action a gave reward r,
+     and terminal is whether the episode then ended
+rec.addTransition(t) - adds an RLinterface Transition (starting an episode for
+     the first step of one)
+rec.extend(transitions) - adds each Transition in transitions, e.g.,
+     rec.extend(rli.iter_episodes(10))
+rec.episode(i) -> dict of array views of the rows of episode i
+rec.episodeLengths(), rec.episodeReturns() -> arrays with one entry per episode
+rec.clear() - forgets everything recorded, keeping the storage
+
+Attributes (views of the rows recorded so far, valid until the next add):
+rec.observations, rec.actions, rec.rewards, rec.terminals
+rec.episodeStarts - the row at which each episode starts
+
+The columns start with room for capacity rows and double in size whenever they
+fill up, so adding a row normally costs only the assignments into the arrays.
+The attributes are views, not copies, so they cost nothing to get, but after the
+columns grow they refer to the old storage; get them again after recording more.
+"""
+
+import numpy as np
+
+
+class TrajectoryRecorder:
+    "Records transitions in preallocated, growing NumPy columns"
+
+    def __init__(self, obsShape=(), obsDtype=float, actionShape=(),
+                 actionDtype=int, capacity=1024):
+        self.obsShape = tuple(obsShape)
+        self.actionShape = tuple(actionShape)
+        self.capacity = capacity
+        self.obsColumn = np.zeros((capacity,) + self.obsShape, dtype=obsDtype)
+        self.actionColumn = np.zeros((capacity,) + self.actionShape,
+                                     dtype=actionDtype)
+        self.rewardColumn = np.zeros(capacity)
+        self.terminalColumn = np.zeros(capacity, dtype=bool)
+        self.startsColumn = np.zeros(16, dtype=np.intp)
+        self.numRows = 0
+        self.numEpisodes = 0
+
+    def clear(self):
+        "Forgets everything recorded, keeping the storage"
+        self.numRows = 0
+        self.numEpisodes = 0
+
+    def grow(self):
+        "Doubles the room in each column"
+        self.capacity *= 2
+        self.obsColumn = grown(self.obsColumn, self.capacity)
+        self.actionColumn = grown(self.actionColumn, self.capacity)
+        self.rewardColumn = grown(self.rewardColumn, self.capacity)
+        self.terminalColumn = grown(self.terminalColumn, self.capacity)
+
+    def startEpisode(self):
+        "Marks the start of a new episode at the next row"
+        if self.numEpisodes > 0 and \
+                self.startsColumn[self.numEpisodes - 1] == self.numRows:
+            return  # the last episode is empty, so just reuse it
+        if self.numEpisodes == len(self.startsColumn):
+            self.startsColumn = grown(self.startsColumn,
+                                      2 * len(self.startsColumn))
+        self.startsColumn[self.numEpisodes] = self.numRows
+        self.numEpisodes += 1
+
+    def add(self, s, a, r, terminal=False):
+        "Adds a row for one transition"
+        if self.numEpisodes == 0:
+            self.startEpisode()
+        if self.numRows == self.capacity:
+            self.grow()
+        row = self.numRows
+        self.obsColumn[row] = s
+        self.actionColumn[row] = a
+        self.rewardColumn[row] = r
+        self.terminalColumn[row] = terminal
+        self.numRows += 1
+
+    def addTransition(self, t):
+        "Adds an RLinterface Transition"
+        if t.r == None:  # first step of an episode
+            self.startEpisode()
+        else:
+            self.add(t.s, t.a, t.r, isinstance(t.sp, str) and t.sp == 'terminal')
+
+    def extend(self, transitions):
+        "Adds each of a sequence (or generator) of RLinterface Transitions"
+        for t in transitions:
+            self.addTransition(t)
+
+    @property
+    def observations(self):
+        return self.obsColumn[:self.numRows]
+
+    @property
+    def actions(self):
+        return self.actionColumn[:self.numRows]
+
+    @property
+    def rewards(self):
+        return self.rewardColumn[:self.numRows]
+
+    @property
+    def terminals(self):
+        return self.terminalColumn[:self.numRows]
+
+    @property
+    def episodeStarts(self):
+        return self.startsColumn[:self.numEpisodes]
+
+    def episodeBounds(self, i):
+        "The first row of episode i and the row after its last"
+        start = self.startsColumn[i]
+        if i + 1 < self.numEpisodes:
+            return start, self.startsColumn[i + 1]
+        return start, self.numRows
+
+    def episode(self, i):
+        "Views of the observations, actions, rewards and terminals of episode i"
+        start, end = self.episodeBounds(i)
+        return {'observations': self.obsColumn[start:end],
+                'actions': self.actionColumn[start:end],
+                'rewards': self.rewardColumn[start:end],
+                'terminals': self.terminalColumn[start:end]}
+
+    def episodeLengths(self):
+        "The number of rows in each episode"
+        return np.diff(np.append(self.episodeStarts, self.numRows))
+
+    def episodeReturns(self):
+        "The total reward of each episode"
+        returns = np.zeros(self.numEpisodes)
+        lengths = self.episodeLengths()
+        nonempty = lengths > 0
+        if nonempty.any():
+            returns[nonempty] = np.add.reduceat(self.rewards,
+                                                self.episodeStarts[nonempty])
+        return returns
+
+
+def grown(array, capacity):
+    "A copy of array with room for capacity rows"
+    new = np.zeros((capacity,) + array.shape[1:], dtype=array.dtype)
+    new[:len(array)] = array
+    return new
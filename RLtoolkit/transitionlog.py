@@ -0,0 +1,263 @@
+# Transition log module
+
+"""
+Saves experience to disk as it is generated, so that it can be replayed later,
+e.g., to train other learners on the same data, without loading it all into
+memory.
+
+A transition log is a directory holding chunk files and an index:
+
+   chunk000000.bin, chunk000001.bin, ...   fixed size binary records, chunkSize
+                                           of them per chunk (except the last)
+   index.json      the record layout (a NumPy dtype), chunkSize, and the number
+                   of records in each chunk
+
+Each record is one transition of the same kind as in trajectory.TrajectoryRecorder:
+fields 'obs' (the sensation), 'action', 'reward', 'terminal' (whether the episode
+then ended) and 'start' (whether this is the first transition of an episode).
+The sensation after a transition is the 'obs' of the next record, unless the
+transition is terminal.  The index is rewritten only after the records it counts
+have been written, so anything beyond what it counts is ignored (and cut off when
+the log is reopened for appending).
+
+     log = TransitionLogWriter(directory, obsShape, obsDtype, actionShape,
+                               actionDtype, chunkSize, bufferSize)
+          makes a new log in directory, or appends to the one already there
+Methods (the same as TrajectoryRecorder's, so it can be given to RLinterface3):
+log.startEpisode(), log.add(s, a, r, terminal), log.addTransition(t),
+log.extend(transitions)
+log.flush() - writes out the buffered records and the index
+log.close() - flushes the log; also done on leaving a with statement
+
+     log = TransitionLog(directory)
+          opens a log for reading; chunks are memory-mapped when first used
+len(log), log[i] - the number of records, and record i
+log.records(indices) -> structured array of the records at the given indices
+log.chunks() - iterates over the chunks, as (memory-mapped) structured arrays
+iter(log) - iterates over all the records, a chunk at a time
+log.sample(n, rng) -> dict of arrays 'obs', 'action', 'reward', 'terminal' and
+     'nextObs' (zero where terminal) for n random transitions; ValueError if
+     there are none with a following sensation (e.g., the log is empty)
+"""
+
+import json
+import os
+import re
+import numpy as np
+
+_indexname = 'index.json'
+_chunkPattern = re.compile(r'chunk(\d+)\.bin')
+
+
+def chunkName(directory, chunkNum):
+    return os.path.join(directory, 'chunk%06d.bin' % chunkNum)
+
+
+def recordDtype(obsShape=(), obsDtype=float, actionShape=(), actionDtype=int):
+    "The record layout for sensations and actions of the given shapes and types"
+    return np.dtype([('obs', obsDtype, tuple(obsShape)),
+                     ('action', actionDtype, tuple(actionShape)),
+                     ('reward', np.float64),
+                     ('terminal', np.bool_),
+                     ('start', np.bool_)])
+
+
+def readIndex(directory):
+    "Returns the record dtype, chunkSize and per chunk counts of a log"
+    with open(os.path.join(directory, _indexname)) as f:
+        index = json.load(f)
+    dtype = np.dtype([(name, np.dtype(typestr), tuple(shape))
+                      for name, typestr, shape in index['fields']])
+    return dtype, index['chunkSize'], index['counts']
+
+
+def writeIndex(directory, dtype, chunkSize, counts):
+    "Replaces the index of a log, all at once"
+    index = {'version': 1, 'chunkSize': chunkSize, 'counts': counts,
+             'fields': [[name, dtype.fields[name][0].base.str,
+                         list(dtype.fields[name][0].shape)]
+                        for name in dtype.names]}
+    temporary = os.path.join(directory, _indexname + '.tmp')
+    with open(temporary, 'w') as f:
+        json.dump(index, f)
+    os.replace(temporary, os.path.join(directory, _indexname))
+
+
+class TransitionLogWriter:
+    "Appends transitions to a log, in buffered blocks"
+
+    def __init__(self, directory, obsShape=(), obsDtype=float, actionShape=(),
+                 actionDtype=int, chunkSize=1 << 20, bufferSize=4096):
+        self.directory = directory
+        self.dtype = recordDtype(obsShape, obsDtype, actionShape, actionDtype)
+        os.makedirs(directory, exist_ok=True)
+        if os.path.exists(os.path.join(directory, _indexname)):
+            dtype, chunkSize, counts = readIndex(directory)
+            if dtype != self.dtype:
+                raise ValueError("Log in " + directory +
+                                 " has records of a different layout")
+            for chunkNum, count in enumerate(counts):  # drop unindexed records
+                name = chunkName(directory, chunkNum)
+                if os.path.getsize(name) > count * dtype.itemsize:
+                    os.truncate(name, count * dtype.itemsize)
+            for filename in os.listdir(directory):  # and unindexed chunks
+                match = _chunkPattern.fullmatch(filename)
+                if match and int(match.group(1)) >= len(counts):
+                    os.remove(os.path.join(directory, filename))
+        else:
+            counts = [0]
+            open(chunkName(directory, 0), 'wb').close()
+            writeIndex(directory, self.dtype, chunkSize, counts)
+        self.chunkSize = chunkSize
+        self.counts = counts
+        self.buffer = np.zeros(bufferSize, dtype=self.dtype)
+        self.numBuffered = 0
+        self.starting = True  # the next record starts an episode
+        if sum(counts) > 0:  # unless it continues the last one logged
+            self.starting = bool(TransitionLog(directory)[-1]['terminal'])
+
+    def startEpisode(self):
+        "Marks the next record as the start of an episode"
+        self.starting = True
+
+    def add(self, s, a, r, terminal=False):
+        "Adds a record for one transition"
+        record = self.buffer[self.numBuffered]
+        record['obs'] = s
+        record['action'] = a
+        record['reward'] = r
+        record['terminal'] = terminal
+        record['start'] = self.starting
+        self.starting = terminal
+        self.numBuffered += 1
+        if self.numBuffered == len(self.buffer):
+            self.flush()
+
+    def addTransition(self, t):
+        "Adds an RLinterface Transition"
+        if t.r == None:  # first step of an episode
+            self.startEpisode()
+        else:
+            self.add(t.s, t.a, t.r, isinstance(t.sp, str) and t.sp == 'terminal')
+
+    def extend(self, transitions):
+        "Adds each of a sequence (or generator) of RLinterface Transitions"
+        for t in transitions:
+            self.addTransition(t)
+
+    def flush(self):
+        "Writes out the buffered records, then the index"
+        data = self.buffer[:self.numBuffered]
+        while len(data) > 0:
+            if self.counts[-1] == self.chunkSize:  # start a new chunk
+                self.counts.append(0)
+                open(chunkName(self.directory, len(self.counts) - 1), 'wb').close()
+            num = min(len(data), self.chunkSize - self.counts[-1])
+            with open(chunkName(self.directory, len(self.counts) - 1), 'ab') as f:
+                f.write(data[:num].tobytes())
+            self.counts[-1] += num
+            data = data[num:]
+        self.numBuffered = 0
+        writeIndex(self.directory, self.dtype, self.chunkSize, self.counts)
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        self.close()
+
+
+class TransitionLog:
+    "Reads a transition log, memory-mapping its chunks"
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.dtype, self.chunkSize, self.counts = readIndex(directory)
+        self.numRecords = sum(self.counts)
+        self.maps = {}  # chunk number -> memory-mapped records
+        self.cutoffs = None  # indices of transitions with no following sensation
+
+    def __len__(self):
+        return self.numRecords
+
+    def chunk(self, chunkNum):
+        "The records of chunk chunkNum, memory-mapped"
+        if chunkNum not in self.maps:
+            count = self.counts[chunkNum]
+            if count == 0:
+                self.maps[chunkNum] = np.zeros(0, dtype=self.dtype)
+            else:
+                self.maps[chunkNum] = np.memmap(chunkName(self.directory, chunkNum),
+                                                dtype=self.dtype, mode='r',
+                                                shape=(count,))
+        return self.maps[chunkNum]
+
+    def chunks(self):
+        for chunkNum in range(len(self.counts)):
+            yield self.chunk(chunkNum)
+
+    def __iter__(self):
+        for chunk in self.chunks():
+            yield from chunk
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self.numRecords
+        if not 0 <= i < self.numRecords:
+            raise IndexError("transition log index out of range")
+        return self.chunk(i // self.chunkSize)[i % self.chunkSize]
+
+    def records(self, indices):
+        "The records at the given indices, gathered chunk by chunk"
+        indices = np.asarray(indices, dtype=np.int64)
+        result = np.empty(len(indices), dtype=self.dtype)
+        chunkNums = indices // self.chunkSize
+        for chunkNum in np.unique(chunkNums):
+            which = chunkNums == chunkNum
+            result[which] = self.chunk(chunkNum)[indices[which] % self.chunkSize]
+        return result
+
+    def cutoffIndices(self):
+        """Sorted indices of the transitions whose following sensation was not
+        logged (the last of an episode that was cut off); found on first use"""
+        if self.cutoffs is None:
+            cutoffs = []
+            start = 0
+            chunkList = [c for c in self.chunks() if len(c) > 0]
+            for i, chunk in enumerate(chunkList):
+                nextStart = np.empty(len(chunk), dtype=bool)
+                nextStart[:-1] = chunk['start'][1:]
+                # the last record of the log has nothing after it
+                nextStart[-1] = chunkList[i + 1]['start'][0] \
+                    if i + 1 < len(chunkList) else True
+                cutoff = ~chunk['terminal'] & nextStart
+                cutoffs.append(start + np.flatnonzero(cutoff))
+                start += len(chunk)
+            self.cutoffs = np.concatenate(cutoffs) if cutoffs else \
+                np.zeros(0, dtype=np.int64)
+        return self.cutoffs
+
+    def sample(self, n, rng=None):
+        """n transitions chosen at random (with replacement), with the sensations
+        that followed them; transitions whose following sensation was not logged
+        (the last of an episode that was cut off) are not chosen"""
+        if rng == None:
+            rng = np.random.default_rng()
+        cutoffs = self.cutoffIndices()
+        numValid = self.numRecords - len(cutoffs)
+        if numValid <= 0:
+            raise ValueError("transition log has no complete transitions to sample")
+        # the k'th valid index is k plus the number of cutoffs before it
+        ranks = rng.integers(0, numValid, size=n)
+        indices = ranks + np.searchsorted(cutoffs - np.arange(len(cutoffs)),
+                                          ranks, side='right')
+        records = self.records(indices)
+        following = self.records(np.minimum(indices + 1, self.numRecords - 1))
+        nextObs = following['obs'].copy()
+        nextObs[records['terminal']] = 0
+        return {'obs': records['obs'], 'action': records['action'],
+                'reward': records['reward'], 'terminal': records['terminal'],
+                'nextObs': nextObs}
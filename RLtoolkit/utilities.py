@@ -3,6 +3,7 @@ import random
 from math import *
 import operator
 from functools import reduce
+import numpy as np
 
 
 def minmax(item, limit1, limit2=None):
@@ -110,47 +111,107 @@ def reorderListOfLists(lofl):
     return list(zip(*lofl))
 
 
+# Random number streams
+# Every function here that draws random numbers takes an optional rng, a
+# RandomStream (or any random.Random); without one, it uses the random module's
+# global generator, as before.
+
+class RandomStream(random.Random):
+    """A random number generator with all the methods of the random module, made
+    from a numpy SeedSequence, so that any number of independent streams can be
+    spawned from it.  self.numpy is a numpy Generator from the same sequence."""
+
+    def __init__(self, seed=None):
+        if not isinstance(seed, np.random.SeedSequence):
+            seed = np.random.SeedSequence(seed)
+        self.seedSequence = seed
+        self.numpy = np.random.Generator(np.random.PCG64(seed))
+        # PCG64 uses the first 4 words of the sequence's state; use the next 4
+        words = seed.generate_state(8, np.uint64)[4:]
+        random.Random.__init__(self, int.from_bytes(words.tobytes(), 'little'))
+
+    def spawn(self, n):
+        "Returns a list of n new streams, independent of this one and each other"
+        return [RandomStream(s) for s in self.seedSequence.spawn(n)]
+
+    def __reduce__(self):
+        return (self.__class__, (self.seedSequence,),
+                (self.getstate(), self.numpy.bit_generator.state))
+
+    def __setstate__(self, state):
+        randomState, numpyState = state
+        self.setstate(randomState)
+        self.numpy.bit_generator.state = numpyState
+
+
+def randomStreams(seed, n):
+    """Returns n independent RandomStreams, the same ones every time for the same
+    seed, e.g., agentRng, envRng = randomStreams(seed, 2) for one run"""
+    return RandomStream(seed).spawn(n)
+
+
+def randomGenerator(rng=None):
+    "Returns rng, or the random module (its global generator) if rng is None"
+    if rng == None:
+        return random
+    return rng
+
+
+def numpyGenerator(rng=None):
+    """Returns a numpy generator for rng: its numpy Generator if it is a
+    RandomStream, one seeded from it if it is another random.Random, numpy.random
+    (the global one) if None, and otherwise rng itself (a numpy Generator)"""
+    if rng is None:
+        return np.random
+    if isinstance(rng, RandomStream):
+        return rng.numpy
+    if isinstance(rng, random.Random):
+        return np.random.default_rng(rng.getrandbits(128))
+    return rng
+
+
 # Policies for an agent to use to choose an action
 
-def randompolicy(numactions):
+def randompolicy(numactions, rng=None):
     "Picks an action based on the random policy"
-    return random.randrange(numactions)
+    return randomGenerator(rng).randrange(numactions)
 
 
-def egreedy(epsilon, numactions, valuelist):
+def egreedy(epsilon, numactions, valuelist, rng=None):
     "Picks an action based on the epsilon greedy policy"
-    if random.random() < epsilon:
-        return randompolicy(numactions)
+    if randomGenerator(rng).random() < epsilon:
+        return randompolicy(numactions, rng)
     else:
-        return argmaxrandom(valuelist)
+        return argmaxrandom(valuelist, rng)
 
 
-def argmax(list):
-    "Returns an index to the first largest element of the nonnull list; also returns max"
+def argmax(values):
+    "Returns an index to the first largest element of the nonnull list"
     best_index = 0
     best_value = values[0]
     for i in range(len(values)):
         val = values[i]
-        if value > best_value:
-            best_value = value
-            best_index = index
+        if val > best_value:
+            best_value = val
+            best_index = i
     return best_index  # do we need to return the value as well?
 
 
-def argmin(list):
-    "Returns an index to the first smallest element of the nonnull list; also returns min"
+def argmin(values):
+    "Returns an index to the first smallest element of the nonnull list"
     best_index = 0
     best_value = values[0]
     for i in range(len(values)):
         val = values[i]
-        if value < best_value:
-            best_value = value
-            best_index = index
+        if val < best_value:
+            best_value = val
+            best_index = i
     return best_index  # do we need to return the value as well?
 
 
-def argmaxrandom(values):
+def argmaxrandom(values, rng=None):
     "Returns the index of the maximum entry in the list of values"
+    rng = randomGenerator(rng)
     best_index = 0
     best_value = values[0]
     numties = 1
@@ -163,13 +224,13 @@ def argmaxrandom(values):
             best_value = val
         else:  # there is a tie; randomly pick
             numties += 1
-            if random.randrange(0, numties) == 0:  # chose the new one
+            if rng.randrange(0, numties) == 0:  # chose the new one
                 best_index = i
                 best_value = val
     return best_index  # old version returned index and value - change?
 
 
-def argmaxspecial(alist):
+def argmaxspecial(alist, rng=None):
     "Returns index to largest in list, breaking ties randomly, or nil if all equal"
     if not reduce(operator.eq, alist):
         bestargs = [0]
@@ -184,71 +245,106 @@ def argmaxspecial(alist):
             elif value == bestvalue:
                 bestargs = bestargs + [i]
             i += 1
-        arg = bestargs[random.randrange(len(bestargs))]
+        arg = bestargs[randomGenerator(rng).randrange(len(bestargs))]
         return arg, bestvalue
     else:
         return None, None
 
 
+# Batched versions, choosing one action for each row of an (N x A) array of
+# action values at once
+
+def argmaxrandombatch(values, rng=None):
+    """Returns an array of the index of the largest entry in each row of values,
+    with ties broken uniformly at random"""
+    values = np.asarray(values)
+    ties = values == values.max(axis=1, keepdims=True)
+    counts = ties.sum(axis=1)
+    # pick the k'th of each row's tied entries, for a random k < count
+    k = (numpyGenerator(rng).random(len(values)) * counts).astype(np.intp)
+    return (ties.cumsum(axis=1) > k[:, None]).argmax(axis=1)
+
+
+def egreedybatch(epsilon, values, rng=None):
+    """Returns an array of an epsilon greedy action for each row of values;
+    epsilon may also be an array of one epsilon per row"""
+    values = np.asarray(values)
+    generator = numpyGenerator(rng)
+    actions = argmaxrandombatch(values, generator)
+    n, numactions = values.shape
+    explore = generator.random(n) < epsilon
+    randomactions = (generator.random(n) * numactions).astype(np.intp)
+    return np.where(explore, randomactions, actions)
+
+
 # Probabilities and Distributions
 
-def randomInInterval(min, max):
+def randomInInterval(min, max, rng=None):
     "returns a random number between min and max"
-    return min + (random.random() * (max - min))
+    return min + (randomGenerator(rng).random() * (max - min))
 
 
-def randomNormal(randomstate=None):
+def randomNormal(randomstate=None, rng=None):
+    rng = randomGenerator(rng)
     if randomstate != None:
-        random.setstate(randomstate)
+        rng.setstate(randomstate)
     u = 0.0
     v = 0.0
     while True:
-        u = random.random()  # u is bounded (0, 1)
+        u = rng.random()  # u is bounded (0, 1)
         v = 2.0 * sqrt(2.0) * exp(-0.5) * (
-        random.random() - 0.5)  # v is bounded (-max, max)
+        rng.random() - 0.5)  # v is bounded (-max, max)
         if (v * v) <= (-4.0 * u * u * log(u)):
             break
     return v / u
 
 
-def standardizeRandomState(randomstate=None):
+def standardizeRandomState(randomstate=None, rng=None):
+    "Seeds rng (the global generator by default) with 64497, or sets its state"
+    rng = randomGenerator(rng)
     if randomstate == None:
-        random.seed(64497)
+        rng.seed(64497)
     else:
-        random.setstate(randomstate)
+        rng.setstate(randomstate)
 
 
-def advanceRandomState(numadvances):
-    random.jumpahead(numadvances)
+def advanceRandomState(numadvances, rng=None):
+    """Advances rng (the global generator by default) as if random() had been
+    called numadvances times; a RandomStream's numpy generator is advanced too"""
+    rng = randomGenerator(rng)
+    for start in range(0, numadvances, 1 << 20):  # each random() uses 64 bits
+        rng.getrandbits(64 * min(numadvances - start, 1 << 20))
+    if isinstance(rng, RandomStream):
+        rng.numpy.bit_generator.advance(numadvances)
 
 
-def withProbability(p):
-    return p > random.random()
+def withProbability(p, rng=None):
+    return p > randomGenerator(rng).random()
 
 
-def withProb(p1, choice1, choice2):
+def withProb(p1, choice1, choice2, rng=None):
     "With probability p1, choose choice1, otherwise choice2"
-    if random.random() < p1:
+    if randomGenerator(rng).random() < p1:
         return choice1
     else:
         return choice2
 
 
-def randomKofN(k, n):
-    random.sample(list(range(n)), k)
+def randomKofN(k, n, rng=None):
+    return randomGenerator(rng).sample(list(range(n)), k)
 
 
-def randomIntegerOtherThan(n, k):
+def randomIntegerOtherThan(n, k, rng=None):
     "Returns a random integer in [0,n1] that is not k"
-    i = random.randrange(n - 1)
+    i = randomGenerator(rng).randrange(n - 1)
     if i >= k:
         return i + 1
     else:
         return i
 
 
-def randomExponential(tau):
-    return - (tau * log(1 - random.random()))
+def randomExponential(tau, rng=None):
+    return - (tau * log(1 - randomGenerator(rng).random()))
 
 
 # stats
@@ -293,5 +389,29 @@ def multistdev(lofl):
     return [stdev(l) for l in reorderListOfLists(lofl)]
 
 
+class RunningStats:
+    """Mean and standard error of a stream of numbers, updated one at a time
+    (Welford's method), agreeing with stats"""
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0  # sum of squared differences from the mean
+
+    def add(self, x):
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+
+    def stdev(self):
+        if self.n == 0:
+            raise ValueError("RunningStats has no samples")
+        return sqrt(self.m2 / self.n)
+
+    def stats(self):
+        return [self.mean, self.stdev() / sqrt(self.n)]
+
+
 def logistic(s):
     return 1.0 / (1.0 + exp(max(-20, min(20, -s))))
@@ -27,6 +27,8 @@ setup(
 
     packages=find_packages(),
 
+    install_requires=['numpy'],
+
     # Author details
     author='Richard Stuart Sutton',
     author_email='rsutton@ualberta.ca',